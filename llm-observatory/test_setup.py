@@ -9,12 +9,14 @@ def test_imports():
     print("✓ All imports successful")
 
 def test_env():
-    load_dotenv()
     keys = ['OPENAI_API_KEY', 'ANTHROPIC_API_KEY']
+    # Skip parsing .env only when every key is already exported
+    if not all(os.getenv(key) for key in keys):
+        load_dotenv()
     for key in keys:
         value = os.getenv(key)
         if value:
-            masked_key = value[:4] + '*' * (len(value) - 8) + value[-4:]
+            masked_key = f"{value[:4]}{'*' * (len(value) - 8)}{value[-4:]}"
             print(f"✓ {key} found: {masked_key}")
         else:
             print(f"✗ {key} not found")
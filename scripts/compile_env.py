@@ -0,0 +1,47 @@
+# scripts/compile_env.py
+
+"""
+Compile the project's .env file into an importable Python module.
+
+Run at deploy time so application startup can load environment values from
+bytecode instead of parsing .env on every import:
+
+    python scripts/compile_env.py
+"""
+
+# Standard library imports
+import os
+import sys
+from pathlib import Path
+from pprint import pformat
+
+# Third-party imports
+from dotenv import dotenv_values
+
+BASE_DIR = Path(__file__).parent.parent
+ENV_FILE = BASE_DIR / ".env"
+CACHE_FILE = BASE_DIR / "src" / "config" / "_env_cache.py"
+
+def compile_env() -> int:
+    """Write .env values and mtime to the env cache module."""
+    if not ENV_FILE.exists():
+        print(f"✗ {ENV_FILE} not found")
+        return 1
+    
+    values = {
+        key: value
+        for key, value in dotenv_values(ENV_FILE).items()
+        if value is not None
+    }
+    
+    CACHE_FILE.write_text(
+        "# Generated by scripts/compile_env.py - do not edit\n\n"
+        f"MTIME = {os.path.getmtime(ENV_FILE)!r}\n\n"
+        f"ENV = {pformat(values)}\n",
+        encoding="utf-8"
+    )
+    print(f"✓ Compiled {len(values)} values into {CACHE_FILE}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(compile_env())
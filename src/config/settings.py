@@ -2,17 +2,45 @@
 
 # Standard library imports
 import os
+import json
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, ClassVar, FrozenSet, List, Optional, Tuple
 
 # Third-party imports
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field, field_validator
 from dotenv import load_dotenv
 
+ENV_FILE = Path(__file__).parent.parent.parent / ".env"
+
+def load_env() -> None:
+    """
+    Load .env values into the process environment.
+    
+    Prefers the module generated by scripts/compile_env.py and only parses
+    .env when that module is missing or older than the file. Variables
+    already present in the environment are never overridden.
+    """
+    if not ENV_FILE.exists():
+        return
+    
+    try:
+        from src.config import _env_cache  # type: ignore[attr-defined]  # generated, may not exist
+    except ImportError:
+        _env_cache = None
+    
+    if _env_cache is not None and ENV_FILE.stat().st_mtime <= _env_cache.MTIME:
+        for key, value in _env_cache.ENV.items():
+            os.environ.setdefault(key, value)
+    else:
+        load_dotenv(ENV_FILE)
+
 # Load environment variables
-load_dotenv()
+load_env()
 
 class LogConfig:
     """Logging configuration."""
@@ -28,6 +56,13 @@ class LLMConfig:
         "gpt-3.5-turbo"
     ]
     
+    # Prompt + completion tokens each OpenAI model accepts per request
+    OPENAI_CONTEXT_WINDOWS: Dict[str, int] = {
+        "gpt-4-turbo-preview": 128000,
+        "gpt-4": 8192,
+        "gpt-3.5-turbo": 16385
+    }
+    
     ANTHROPIC_MODELS: List[str] = [
         "claude-3-5-sonnet-latest",
         "claude-3-opus-latest",
@@ -37,12 +72,53 @@ class LLMConfig:
         "gemini-1",
         "gemini-2"
     ]
+    
+    # Precomputed lookups for per-request model validation
+    OPENAI_MODELS_SET: FrozenSet[str] = frozenset(OPENAI_MODELS)
+    ANTHROPIC_MODELS_SET: FrozenSet[str] = frozenset(ANTHROPIC_MODELS)
+    GEMINI_MODELS_SET: FrozenSet[str] = frozenset(GEMINI_MODELS)
+    MODEL_TO_PROVIDER: Dict[str, str] = (
+        dict.fromkeys(OPENAI_MODELS, "openai")
+        | dict.fromkeys(ANTHROPIC_MODELS, "anthropic")
+        | dict.fromkeys(GEMINI_MODELS, "gemini")
+    )
+    # Immutable option lists for the sidebar model selectbox
+    MODELS_BY_PROVIDER: Dict[str, Tuple[str, ...]] = {
+        "OpenAI": tuple(OPENAI_MODELS),
+        "Anthropic": tuple(ANTHROPIC_MODELS),
+        "Gemini": tuple(GEMINI_MODELS)
+    }
     DEFAULT_PARAMETERS: Dict[str, Any] = {
         "temperature": 0.7,
         "max_tokens": 500,
         "timeout": 30,  # seconds
         "retry_attempts": 3
     }
+    # Upper bound on in-flight requests when a batch of prompts is sent
+    MAX_CONCURRENT_REQUESTS: int = 8
+    # Entries kept by an LLMCache of deterministic (temperature 0) responses
+    RESPONSE_CACHE_SIZE: int = 256
+    # Minimum cosine similarity for a SemanticCache hit on a paraphrased prompt
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    # Use HTTP/2 for the OpenAI client when the h2 package is installed
+    OPENAI_HTTP2: bool = True
+    # Client-side limits for BaseLLM.generate_many() (requests / tokens per minute)
+    RATE_LIMIT_RPM: int = 3000
+    RATE_LIMIT_TPM: int = 250000
+    # BaseLLM.buffered_generation(): batch size and how long a batch may wait to fill
+    BATCH_MAX_SIZE: int = 32
+    BATCH_FLUSH_INTERVAL_SEC: float = 0.01
+    # OpenAI Batch API: poll backoff bounds and the discount applied to its token prices
+    BATCH_POLL_INTERVAL_SEC: float = 5.0
+    BATCH_POLL_MAX_INTERVAL_SEC: float = 60.0
+    OPENAI_BATCH_COST_FACTOR: float = 0.5
+    # Log the full prompt/response for 1 in N interactions (1 logs every one)
+    LOG_SAMPLE_RATE: int = 1
+    # Full-jitter retry backoff: sleep uniform(0, min(cap, base * 2**attempt))
+    RETRY_BASE_SEC: float = 1.0
+    RETRY_CAP_SEC: float = 20.0
+    # How long cleanup() waits for a client's connection pool to close
+    CLIENT_CLOSE_TIMEOUT_SEC: float = 5.0
 
 class MonitoringConfig:
     """Monitoring-specific configurations."""
@@ -59,6 +135,77 @@ class MonitoringConfig:
         "cost_limit": 10.0     # dollars
     }
 
+# Fallback pricing used when data/model_costs.json is missing or unreadable
+DEFAULT_MODEL_COSTS: Dict[str, Dict[str, Dict[str, float]]] = {
+    "openai": {
+        "gpt-4-turbo-preview": {"input": 0.01, "output": 0.03},
+        "gpt-4": {"input": 0.03, "output": 0.06},
+        "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015}
+    },
+    "anthropic": {
+        "claude-3-5-sonnet-latest": {"input": 0.003, "output": 0.015},
+        "claude-3-opus-latest": {"input": 0.015, "output": 0.075},
+        "claude-3-haiku-20240307": {"input": 0.015, "output": 0.075}
+    }
+}
+
+class ModelCostTable:
+    """
+    Model costs read from a JSON file and reloaded when its mtime changes.
+    
+    Each lookup only stats the file; it is re-read after an edit. If a read
+    fails the previous table keeps serving, which is DEFAULT_MODEL_COSTS
+    until the file has been read successfully once.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._mtime: Optional[float] = None
+        self._checked = False
+        # Nested and (provider, model)-keyed views, swapped together on reload
+        self._tables = (DEFAULT_MODEL_COSTS, self._flatten(DEFAULT_MODEL_COSTS))
+    
+    @staticmethod
+    def _flatten(
+        costs: Dict[str, Dict[str, Dict[str, float]]]
+    ) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Model costs keyed by (provider, model)."""
+        return {
+            (provider, model): model_costs
+            for provider, models in costs.items()
+            for model, model_costs in models.items()
+        }
+    
+    def _refresh(self) -> None:
+        """Re-read the file if it changed since the last check."""
+        try:
+            mtime: Optional[float] = self.path.stat().st_mtime
+        except OSError:
+            mtime = None
+        if self._checked and mtime == self._mtime:
+            return
+        self._checked, self._mtime = True, mtime
+        
+        try:
+            costs = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logging.getLogger(__name__).warning(
+                f"Keeping current model costs, could not read {self.path}: {str(e)}"
+            )
+            return
+        self._tables = (costs, self._flatten(costs))
+    
+    @property
+    def costs(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Per-1K-token model costs by provider."""
+        self._refresh()
+        return self._tables[0]
+    
+    def get(self, provider: str, model: str) -> Dict[str, float]:
+        """Cost per 1K tokens for one model, or {} if it is not priced."""
+        self._refresh()
+        return self._tables[1].get((provider, model), {})
+
 class Settings(BaseSettings):
     """Main configuration class."""
     
@@ -67,10 +214,6 @@ class Settings(BaseSettings):
     VERSION: str = "0.1.0"
     DEBUG: bool = False
     
-    # API Keys
-    OPENAI_API_KEY: str = ""
-    ANTHROPIC_API_KEY: str = ""
-    
     # File paths
     BASE_DIR: Path = Path(__file__).parent.parent.parent
     LOG_DIR: Path = BASE_DIR / "logs"
@@ -81,69 +224,105 @@ class Settings(BaseSettings):
     LOGGING: LogConfig = LogConfig()
     MONITORING: MonitoringConfig = MonitoringConfig()
     
-    # Cost tracking
-    MODEL_COSTS: Dict[str, Dict[str, Dict[str, float]]] = {
-        "openai": {
-            "gpt-4-turbo-preview": {"input": 0.01, "output": 0.03},
-            "gpt-4": {"input": 0.03, "output": 0.06},
-            "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015}
-        },
-        "anthropic": {
-            "claude-3-5-sonnet-latest": {"input": 0.003, "output": 0.015},
-            "claude-3-opus-latest": {"input": 0.015, "output": 0.075},
-            "claude-3-haiku-20240307": {"input": 0.015, "output": 0.075}
-        }
-    }
+    # Set once logging has been configured for this process
+    _configured: ClassVar[bool] = False
     
+    # .env is already merged into os.environ by load_env(), so only the
+    # process environment is read here; unknown fields are rejected and the
+    # instance is immutable once validated
     model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
         case_sensitive=True,
-        extra="ignore"
+        extra="forbid",
+        frozen=True
     )
     
-    @field_validator("OPENAI_API_KEY", "ANTHROPIC_API_KEY", mode="before")
-    def validate_keys(cls, v: str, info: Field) -> str:
-        """Validate API keys from environment."""
-        if not v:
-            v = os.getenv(info.name, "")
-        return v
+    # API Keys - resolved from the environment on first access so providers
+    # that are never selected don't pay for the lookup
+    @cached_property
+    def OPENAI_API_KEY(self) -> str:
+        """OpenAI API key from environment."""
+        return os.getenv("OPENAI_API_KEY", "")
+    
+    @cached_property
+    def ANTHROPIC_API_KEY(self) -> str:
+        """Anthropic API key from environment."""
+        return os.getenv("ANTHROPIC_API_KEY", "")
     
     def setup_logging(self) -> None:
-        """Setup logging configuration."""
-        self.LOG_DIR.mkdir(parents=True, exist_ok=True)
+        """Setup logging configuration. Expects setup_directories() to have run."""
+        if Settings._configured:
+            return
+        
+        # File and console writes happen on the listener thread so logging
+        # never blocks the caller (e.g. the event loop running LLM calls)
+        formatter = logging.Formatter(self.LOGGING.FORMAT)
+        handlers: List[logging.Handler] = [
+            logging.FileHandler(self.LOG_DIR / self.LOGGING.FILENAME),
+            logging.StreamHandler()
+        ]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        log_queue: queue.Queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        
+        # Records are fully formatted by the listener's handlers
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
         
         logging.basicConfig(
             level=getattr(logging, self.LOGGING.LEVEL),
-            format=self.LOGGING.FORMAT,
-            handlers=[
-                logging.FileHandler(self.LOG_DIR / self.LOGGING.FILENAME),
-                logging.StreamHandler()
-            ]
+            handlers=[queue_handler]
         )
+        Settings._configured = True
     
     def setup_directories(self) -> None:
         """Create necessary directories."""
         self.LOG_DIR.mkdir(parents=True, exist_ok=True)
         self.DATA_DIR.mkdir(parents=True, exist_ok=True)
     
+    @cached_property
     def check_api_keys(self) -> Dict[str, bool]:
-        """Check if API keys are present."""
+        """Whether each provider's API key is present."""
         return {
             "openai": bool(self.OPENAI_API_KEY),
             "anthropic": bool(self.ANTHROPIC_API_KEY)
         }
     
+    # Cost tracking - loaded from DATA_DIR so pricing can be updated without
+    # a code change or a restart
+    @cached_property
+    def _cost_table(self) -> "ModelCostTable":
+        """Model costs backed by DATA_DIR/model_costs.json."""
+        return ModelCostTable(self.DATA_DIR / "model_costs.json")
+    
+    @property
+    def MODEL_COSTS(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Per-1K-token model costs by provider."""
+        return self._cost_table.costs
+    
     def get_model_cost(self, provider: str, model: str) -> Dict[str, float]:
         """Get cost per token for a specific model."""
-        return self.MODEL_COSTS.get(provider, {}).get(model, {})
+        return self._cost_table.get(provider, model)
 
-# Create settings instance
-settings = Settings()
-
-# Setup logging and directories
-settings.setup_directories()
-settings.setup_logging()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Build the application settings once per process.
+    
+    Subsequent calls return the cached instance, so reading .env, creating
+    directories and configuring logging only happen on first access.
+    """
+    settings = Settings()
+    settings.setup_directories()
+    settings.setup_logging()
+    
+    logging.getLogger(__name__).info(
+        f"Loaded configuration for {settings.PROJECT_NAME} v{settings.VERSION}"
+    )
+    return settings
 
-logger = logging.getLogger(__name__)
-logger.info(f"Loaded configuration for {settings.PROJECT_NAME} v{settings.VERSION}")
\ No newline at end of file
+# Shared instance for modules that read settings at import time
+settings = get_settings()
@@ -1,31 +1,187 @@
 import asyncio
+import atexit
+import concurrent.futures
+import csv
+import hashlib
+import io
+import itertools
+import logging
+import orjson
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
 import streamlit as st
-from typing import Dict, Any
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, Callable, ClassVar, Iterator, List, Tuple
 from datetime import datetime
 
-from src.config.settings import settings
-from src.llm.openai_llm import OpenAILLM
-from src.llm.anthropic_llm import AnthropicLLM
+from src.config.settings import get_settings
+from src.llm.base import BaseLLM
+from src.interface.styles import PAGE_CSS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Keep these lines exactly as they are
+PAGE_HEADER = (
+    '<div class="main-title">🔭 LLM Observatory</div>'
+    '<div class="subtitle">Unlock Model Insights: '
+    '<span class="highlight">Track Performance</span>, '
+    '<span class="highlight">Control Costs</span>, '
+    '<span class="highlight">Drive Results</span></div>'
+)
+
+@dataclass(slots=True, frozen=True)
+class LLMCall:
+    """One recorded LLM call shown on the performance dashboard."""
+    timestamp: int  # epoch nanoseconds
+    provider: str
+    model: str
+    prompt_preview: str
+    prompt_len: int
+    total_tokens: int
+    response_time: float
+    total_cost: float
+    tokens_per_second: float
+    cost_per_token: float
+
+@st.cache_resource(show_spinner=False)
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Start the background event loop that owns the cached LLM clients.
+    
+    Async clients keep connection pools bound to the loop they run on, so
+    they are driven from one long-lived loop rather than a fresh loop per
+    script run.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return loop
+
+@st.cache_resource(show_spinner=False)
+def _get_llm(provider: str, model: str, application_id: str, environment: str) -> BaseLLM:
+    """Create the LLM client once per provider/model/application/environment."""
+    settings = get_settings()
+    # Provider SDKs are only imported once a provider is actually used
+    if provider == "OpenAI":
+        from src.llm.openai_llm import OpenAILLM
+        llm: BaseLLM = OpenAILLM(
+            api_key=settings.OPENAI_API_KEY,
+            model=model,
+            application_id=application_id,
+            environment=environment
+        )
+    else:
+        from src.llm.anthropic_llm import AnthropicLLM
+        llm = AnthropicLLM(
+            api_key=settings.ANTHROPIC_API_KEY,
+            model=model,
+            application_id=application_id,
+            environment=environment
+        )
+    atexit.register(_close_llm, llm, _get_event_loop())
+    return llm
+
+def _run_coroutine(coro):
+    """Run a coroutine on the background event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result()
+
+async def _anext(stream: AsyncIterator):
+    """Await the next item of an async iterator (as a coroutine for the loop)."""
+    return await stream.__anext__()
 
-# Add new imports for dashboard components
-import plotly.express as px
-import plotly.graph_objects as go
-from src.interface.dashboard import DashboardComponents
+def _iter_stream(stream: AsyncIterator, result: Dict[str, Any]) -> Iterator[str]:
+    """
+    Drive an LLM stream on the background loop as a sync text iterator.
+    
+    Text chunks are yielded for st.write_stream; the final response
+    dictionary is copied into result.
+    """
+    loop = _get_event_loop()
+    while True:
+        try:
+            item = asyncio.run_coroutine_threadsafe(_anext(stream), loop).result()
+        except StopAsyncIteration:
+            return
+        if isinstance(item, dict):
+            result.update(item)
+        else:
+            yield item
+
+async def _gather_responses(requests: List[Tuple[Callable[[], BaseLLM], str]],
+                            max_concurrency: int,
+                            **params) -> List[Any]:
+    """
+    Send (client factory, prompt) requests concurrently, at most
+    max_concurrency at a time.
+    
+    Each client is obtained inside its own request, so a client that can't be
+    created fails only that request. Clients are built on a worker thread
+    since their setup blocks.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def _one(get_llm: Callable[[], BaseLLM], prompt: str) -> Dict[str, Any]:
+        async with semaphore:
+            llm = await asyncio.to_thread(get_llm)
+            return await llm.generate_response(prompt=prompt, **params)
+    
+    # Failures are returned in place so one bad request doesn't sink the rest
+    return await asyncio.gather(*(_one(get_llm, p) for get_llm, p in requests), return_exceptions=True)
+
+def _config_table(config: Dict[str, str]) -> str:
+    """Render settings as a markdown table; avoids a DataFrame per rerun."""
+    lines = ["| Setting | Value |", "|---|---|"]
+    for name, value in config.items():
+        escaped = value.replace("|", r"\|")
+        lines.append(f"| {name} | {escaped} |")
+    return "\n".join(lines)
+
+def _response_key(provider: str, model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+    """Digest identifying a request for the session response cache."""
+    raw = f"{provider}|{model}|{temperature}|{max_tokens}|{prompt}".encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+def _error_response(message: str) -> Dict[str, Any]:
+    """Response placeholder for a failed request; callers skip it when "error" is set."""
+    return {"response": "", "metadata": {}, "error": message}
+
+def _summary_csv(summary: Dict[str, Any]) -> str:
+    """Render the one-row session summary as CSV text."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(summary), lineterminator="\n")
+    writer.writeheader()
+    writer.writerow(summary)
+    return buffer.getvalue()
+
+def _close_llm(llm: BaseLLM, loop: asyncio.AbstractEventLoop) -> None:
+    """Close a cached LLM client's connections at interpreter exit."""
+    if not loop.is_running():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(llm.cleanup(), loop).result(timeout=5)
+    except concurrent.futures.TimeoutError:
+        pass
 
 class LLMInsightsHub:
     """Streamlit interface for LLM Insights Hub."""
     
-    ENVIRONMENTS = ["Development", "Test", "Integration", "Production"]
-    ENV_MAP = {
+    ENVIRONMENTS: ClassVar[Tuple[str, ...]] = ("Development", "Test", "Integration", "Production")
+    ENV_MAP: ClassVar[Dict[str, str]] = {
         "Development": "dev",
         "Test": "test",
         "Integration": "int",
         "Production": "prod"
     }
+    PROVIDERS: ClassVar[Tuple[str, ...]] = ("OpenAI", "Anthropic")
+    MAX_MESSAGES: ClassVar[int] = 50
+    MAX_CACHED_RESPONSES: ClassVar[int] = 100
 
     def __init__(self):
         """Initialize the application."""
+        self.settings = get_settings()
         self.setup_page_config()
         self.initialize_session_state()
 
@@ -37,273 +193,30 @@ class LLMInsightsHub:
             layout="wide",
             initial_sidebar_state="expanded"
         )
-        st.markdown(
-            """
-            <style>
-            /* Main title styling */
-            .main-title {
-                font-family: 'Helvetica Neue', Arial, sans-serif;
-                font-size: 2.8em;
-                font-weight: 600;
-                color: #2C3E50;
-                background: linear-gradient(to right, #E8F4F8, #F8F9FA);
-                padding: 20px;
-                border-radius: 10px;
-                text-align: center;
-                margin-bottom: 10px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-            }
-            
-            /* Subtitle styling */
-            .subtitle {
-                font-family: 'Helvetica Neue', Arial, sans-serif;
-                font-size: 1.2em;
-                font-weight: 400;
-                color: #5D6D7E;
-                text-align: center;
-                margin-bottom: 30px;
-                padding: 0 20px;
-                line-height: 1.5;
-                letter-spacing: 0.3px;
-            }
-            
-            /* Highlight key terms in subtitle */
-            .highlight {
-                color: #3498DB;
-                font-weight: 500;
-            }
-            
-            /* General page styling */
-            .stApp {
-                background-color: #FAFBFC;
-                color: #2C3E50;
-            }
-            # Sidebar style 
-            
-            /* Sidebar background and text styling */
-            [data-testid="stSidebar"] {
-                background-color: #E0F7FA;  /* Light blue background */
-                color: #1E1E1E; /* Dark font color for contrast */
-            }
-
-            /* Sidebar headers and paragraphs text color */
-            [data-testid="stSidebar"] h1, 
-            [data-testid="stSidebar"] h2, 
-            [data-testid="stSidebar"] h3, 
-            [data-testid="stSidebar"] p {
-                color: #1E1E1E;
-            }
-
-            /* Advanced Settings button styling */
-            [data-testid="stSidebar"] .streamlit-expanderHeader {
-                background-color: #FFFFFF !important; /* Light background for visibility */
-                color: #333333 !important; /* Dark text color */
-            }
-
-            /* Show/Hide Performance Analytics button */
-            [data-testid="stSidebar"] .stButton > button {
-                background-color: #007BFF;  /* Bright blue for contrast */
-                color: #FFFFFF !important;  /* White text */
-                border: none;
-                border-radius: 5px;
-                padding: 10px 15px;
-                font-weight: 500;
-            }
-
-            /* Button hover effect */
-            [data-testid="stSidebar"] .stButton > button:hover {
-                background-color: #0056b3;
-                color: #FFFFFF;
-            }
-            
-            # sidebar style ends 
-            
-            
-            
-            /* Keep existing main content styles */
-            .stMetric {
-                background-color: #FFFFFF;
-                border-radius: 8px;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-                padding: 10px;
-                color: #2C3E50;
-            }
-            
-            .stChatMessage {
-                background-color: #FFFFFF;
-                border-radius: 8px;
-                padding: 10px;
-                margin: 5px 0;
-                box-shadow: 0 1px 3px rgba(0,0,0,0.05);
-                color: #2C3E50;
-            }
-            /* Chat Interface Text Styling */
-            .stChatMessage p {
-                color: #2C3E50 !important;
-                font-size: 1rem;
-            }
-
-            /* Chat Message Background */
-            .stChatMessage {
-                background-color: #FFFFFF !important;
-                border-radius: 8px;
-                padding: 10px;
-                margin: 5px 0;
-                box-shadow: 0 1px 3px rgba(0,0,0,0.05);
-            }
-
-            /* Dashboard and Metrics Text */
-            .element-container div {
-                color: #2C3E50 !important;
-            }
-
-           /* Complete Advanced Settings Panel Fix */
-            /* Main expander header */
-            [data-testid="stSidebar"] .streamlit-expanderHeader {
-                color: #ECF0F1 !important;
-                background-color: #2C3E50 !important;
-            }
-
-            /* Expander content background */
-            [data-testid="stSidebar"] .streamlit-expanderContent {
-                background-color: #34495E !important;
-                color: #ECF0F1 !important;
-                padding: 15px !important;
-                border-radius: 8px !important;
-            }
-
-            /* All text within Advanced Settings */
-            [data-testid="stSidebar"] .streamlit-expanderContent p,
-            [data-testid="stSidebar"] .streamlit-expanderContent span,
-            [data-testid="stSidebar"] .streamlit-expanderContent label {
-                color: #ECF0F1 !important;
-            }
-
-            /* Slider specific styles */
-            [data-testid="stSidebar"] .stSlider label,
-            [data-testid="stSidebar"] .stSlider label > div {
-                color: #ECF0F1 !important;
-            }
-
-            /* Slider value and range text */
-            [data-testid="stSidebar"] [data-testid="stTickBarMin"],
-            [data-testid="stSidebar"] [data-testid="stTickBarMax"],
-            [data-testid="stSidebar"] .stSlider [data-testid="stThumbValue"] {
-                color: #ECF0F1 !important;
-            }
-
-            /* Help text for sliders */
-            [data-testid="stSidebar"] .stSlider > div > div > div[data-baseweb="tooltip"] {
-                color: #ECF0F1 !important;
-            }
-
-            /* Temperature and token labels */
-            [data-testid="stSidebar"] .stSlider > div:first-child {
-                color: #ECF0F1 !important;
-            }
-
-            /* Make sure slider numbers are visible */
-            [data-testid="stSidebar"] .stSlider [role="slider"] {
-                color: #ECF0F1 !important;
-                background-color: #3498DB !important;
-            }
-            
-            /* Advanced Settings Header Specific - Title and Hover Effect */
-            [data-testid="stSidebar"] button[kind="secondary"] {
-                color: #ECF0F1 !important;
-                transition: color 0.3s ease;
-            }
-
-            [data-testid="stSidebar"] button[kind="secondary"]:hover {
-                color: #E74C3C !important;  /* Red color on hover */
-            }
-
-            /* Slider Min/Max Values and Labels */
-            [data-testid="stSidebar"] .stSlider [data-testid="stTickBarMin"],
-            [data-testid="stSidebar"] .stSlider [data-testid="stTickBarMax"],
-            [data-testid="stSidebar"] .stSlider div[role="slider"],
-            [data-testid="stSidebar"] .stSlider [data-testid="stThumbValue"] {
-                color: #ECF0F1 !important;
-                font-weight: 400;
-            }
-
-            /* Make sure the numbers in the slider are clearly visible */
-            [data-testid="stSidebar"] .stSlider div[data-baseweb="slider"] div {
-                color: #ECF0F1 !important;
-            }
-
-            /* Performance Dashboard Toggle Text */
-            [data-testid="stSidebar"] .stButton div {
-                color: #ECF0F1 !important;
-            }
-
-            /* Fix for all expandable sections in sidebar */
-            [data-testid="stSidebar"] button[kind="secondary"] {
-                color: #ECF0F1 !important;
-            }
-
-            /* Dashboard Metrics and Text */
-            .stMarkdown div p {
-                color: #2C3E50 !important;
-            }
-
-            /* Dashboard Tab Labels */
-            .stTabs button[role="tab"] {
-                color: #2C3E50 !important;
-            }
-
-            /* Metrics Values */
-            .stMetric [data-testid="stMetricValue"] {
-                color: #2C3E50 !important;
-            }
-
-            /* Metric Labels */
-            .stMetric [data-testid="stMetricLabel"] {
-                color: #2C3E50 !important;
-            }
-
-            /* JSON and Code blocks */
-            pre {
-                color: #2C3E50 !important;
-                background-color: #F8F9FA !important;
-            }
-
-            /* DataFrame Text */
-            .dataframe {
-                color: #2C3E50 !important;
-            }
-
-            /* All text in main content area */
-            .main .block-container {
-                color: #2C3E50 !important;
-            }
-            
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
-        # Keep these lines exactly as they are
-        st.markdown('<div class="main-title">🔭 LLM Observatory</div>', unsafe_allow_html=True)
-        st.markdown(
-            '<div class="subtitle">Unlock Model Insights: '
-            '<span class="highlight">Track Performance</span>, '
-            '<span class="highlight">Control Costs</span>, '
-            '<span class="highlight">Drive Results</span></div>', 
-            unsafe_allow_html=True
-        )
+        # Stylesheet, title and subtitle go out as a single element per rerun
+        st.markdown(PAGE_CSS + PAGE_HEADER, unsafe_allow_html=True)
         st.sidebar.header("Control Panel")
     
     def initialize_session_state(self):
         """Initialize session state variables."""
         defaults = {
-            "messages": [],
+            "messages": deque(maxlen=self.MAX_MESSAGES),
             "total_tokens": 0,
             "total_cost": 0.0,
-            "response_times": [],
+            "rt_sum": 0.0,
+            "rt_count": 0,
             "application_name": "app-llm-insights",
             "environment": "Development",
-            "llm_history": [],
-            "show_dashboard": False
+            "llm_history": deque(maxlen=10),
+            "llm_history_version": 0,
+            "history_df": None,
+            "provider_metrics": {},
+            "response_cache": {},
+            "show_dashboard": False,
+            "temperature": self.settings.LLM.DEFAULT_PARAMETERS["temperature"],
+            "max_tokens": self.settings.LLM.DEFAULT_PARAMETERS["max_tokens"],
+            "batch_mode": False,
+            "compare_mode": False
         }
         for key, value in defaults.items():
             if key not in st.session_state:
@@ -313,87 +226,187 @@ class LLMInsightsHub:
         """Render sidebar configuration options."""
         with st.sidebar:
             st.subheader("Application Settings")
+            # Widgets are bound to their session state keys directly
             application_name = st.text_input(
                 "Application Name",
-                value=st.session_state.application_name,
+                key="application_name",
                 placeholder="Enter your application name",
                 help="Unique identifier for your application"
             )
             environment = st.selectbox(
                 "Environment",
                 options=self.ENVIRONMENTS,
-                index=self.ENVIRONMENTS.index(st.session_state.environment),
+                key="environment",
                 help="Select the deployment environment"
             )
-            st.session_state.application_name = application_name
-            st.session_state.environment = environment
             if not application_name:
                 st.sidebar.warning("⚠️ Please enter an application name")
                 
             st.sidebar.divider()
             st.subheader("LLM Configuration")
-            provider = st.selectbox("Select LLM Provider", options=["OpenAI", "Anthropic"])
-            model = st.selectbox("Select Model", options=settings.LLM.OPENAI_MODELS if provider == "OpenAI" else settings.LLM.ANTHROPIC_MODELS)
-            with st.expander("Advanced Settings"):
-                temperature = st.slider("Temperature", min_value=0.0, max_value=1.0, value=0.7, step=0.1, help="Controls randomness in the response")
-                max_tokens = st.slider("Max Tokens", min_value=50, max_value=2000, value=500, step=50, help="Maximum length of the response")
+            provider = st.selectbox("Select LLM Provider", options=self.PROVIDERS)
+            model = st.selectbox("Select Model", options=self.settings.LLM.MODELS_BY_PROVIDER[provider])
+            self.render_advanced_settings()
             if application_name:
                 st.sidebar.divider()
                 st.sidebar.subheader("Current Configuration")
-                config_df = pd.DataFrame({
-                    'Setting': ['Application', 'Environment', 'Provider', 'Model'],
-                    'Value': [application_name, environment, provider, model]
-                })
-                st.sidebar.dataframe(config_df, hide_index=True)
+                st.sidebar.markdown(_config_table({
+                    "Application": application_name,
+                    "Environment": environment,
+                    "Provider": provider,
+                    "Model": model
+                }))
             
 
-            # Add the download summary button here
             # Session Summary Metrics added on 11/1
-            try:
-                self.download_summary()
-            except Exception as e:
-                st.error(f"An error occurred while preparing the download summary: {str(e)}")
+            self.download_summary()
                 
-            return provider, model, temperature, max_tokens, application_name, self.ENV_MAP[environment]
-
-    async def get_llm_response(self, 
-                         provider: str,
-                         model: str,
-                         prompt: str,
-                         temperature: float,
-                         max_tokens: int,
-                         application_name: str,
-                         environment: str) -> Dict[str, Any]:
-        """Get response from selected LLM."""
-        try:
-            if not application_name:
-                raise ValueError("Application name cannot be empty.")
+            return (
+                provider,
+                model,
+                st.session_state.temperature,
+                st.session_state.max_tokens,
+                st.session_state.batch_mode,
+                st.session_state.compare_mode,
+                application_name,
+                self.ENV_MAP[environment]
+            )
 
-            if provider == "Anthropic" and model not in settings.LLM.ANTHROPIC_MODELS:
-                raise ValueError(f"Model '{model}' is not available in Anthropic's model list.")
-            
-            if provider == "OpenAI":
-                async with OpenAILLM(
-                    api_key=settings.OPENAI_API_KEY,
-                    model=model,
-                    application_id=application_name,
-                    environment=environment
-                ) as llm:
-                    return await llm.generate_response(prompt=prompt, temperature=temperature, max_tokens=max_tokens)
-            else:
-                # AnthropicLLM does not support async context manager, so we instantiate it without `async with`
-                llm = AnthropicLLM(
-                    api_key=settings.ANTHROPIC_API_KEY,
-                    model=model,
-                    application_id=application_name,
-                    environment=environment
-                )
-                return await llm.generate_response(prompt=prompt, temperature=temperature, max_tokens=max_tokens)
-        except  ValueError as e:
+    @st.fragment
+    def render_advanced_settings(self):
+        """
+        Render generation settings as a fragment.
+        
+        Adjusting a slider only reruns this expander; the values are read from
+        session state on the next full run (e.g. when a message is sent).
+        """
+        with st.expander("Advanced Settings"):
+            st.slider("Temperature", min_value=0.0, max_value=1.0, step=0.1, key="temperature", help="Controls randomness in the response")
+            st.slider("Max Tokens", min_value=50, max_value=2000, step=50, key="max_tokens", help="Maximum length of the response")
+            st.checkbox("Batch Mode", key="batch_mode", help="Send each line of a message as a separate prompt")
+            st.checkbox("Compare Providers", key="compare_mode", help="Send each prompt to every provider at the same time")
+
+    def validate_request(self, provider: str, model: str, application_name: str) -> None:
+        """Raise ValueError if the selected configuration can't be sent."""
+        if not application_name:
+            raise ValueError("Application name cannot be empty.")
+
+        if provider == "Anthropic" and model not in self.settings.LLM.ANTHROPIC_MODELS_SET:
+            raise ValueError(f"Model '{model}' is not available in Anthropic's model list.")
+
+    def stream_llm_response(self,
+                            provider: str,
+                            model: str,
+                            prompt: str,
+                            temperature: float,
+                            max_tokens: int,
+                            application_name: str,
+                            environment: str) -> Dict[str, Any]:
+        """
+        Stream the response from the selected LLM into the current container.
+        
+        Failures are shown in place and returned as an error response.
+        """
+        try:
+            self.validate_request(provider, model, application_name)
+            llm = _get_llm(provider, model, application_name, environment)
+            result: Dict[str, Any] = {}
+            chunks = _iter_stream(
+                llm.stream_response(prompt=prompt, temperature=temperature, max_tokens=max_tokens),
+                result
+            )
+            # Spinner only until the first chunk arrives
+            with st.spinner("Thinking..."):
+                first = next(chunks, "")
+            st.write_stream(itertools.chain([first], chunks))
+            if "metadata" not in result:
+                st.error("The response stream ended before it completed.")
+                return _error_response("Stream ended without a final response")
+            return result
+        except ValueError as e:
             st.error(f"Model Error: {str(e)}")
+            return _error_response(str(e))
         except Exception as e:
+            logger.exception("LLM request failed")
             st.error("An unexpected error occurred. Please check your configurations.")
-            raise e
+            return _error_response(str(e))
+
+    def cache_response(self, key: str, text: str) -> None:
+        """Remember a deterministic response's text, evicting the oldest past the cap."""
+        cache = st.session_state.response_cache
+        if len(cache) >= self.MAX_CACHED_RESPONSES:
+            cache.pop(next(iter(cache)))
+        cache[key] = text
+
+    def get_llm_responses_batch(self,
+                                provider: str,
+                                model: str,
+                                prompts: List[str],
+                                temperature: float,
+                                max_tokens: int,
+                                application_name: str,
+                                environment: str) -> List[Any]:
+        """
+        Get responses for several prompts concurrently from one LLM client.
+        
+        Returns one entry per prompt, in order: the response dictionary, or
+        the exception raised for that prompt.
+        """
+        try:
+            self.validate_request(provider, model, application_name)
+            llm = _get_llm(provider, model, application_name, environment)
+            return _run_coroutine(_gather_responses(
+                [(lambda: llm, prompt) for prompt in prompts],
+                self.settings.LLM.MAX_CONCURRENT_REQUESTS,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ))
+        except ValueError as e:
+            st.error(f"Model Error: {str(e)}")
+            return []
+        except Exception:
+            logger.exception("LLM request failed")
+            st.error("An unexpected error occurred. Please check your configurations.")
+            return []
+
+    def compare_targets(self, provider: str, model: str) -> List[Tuple[str, str]]:
+        """Provider/model pairs for compare mode: the selection plus each other provider's first model."""
+        return [
+            (name, model if name == provider else self.settings.LLM.MODELS_BY_PROVIDER[name][0])
+            for name in self.PROVIDERS
+        ]
+
+    def get_llm_responses_parallel(self,
+                                   targets: List[Tuple[str, str]],
+                                   prompt: str,
+                                   temperature: float,
+                                   max_tokens: int,
+                                   application_name: str,
+                                   environment: str) -> List[Any]:
+        """
+        Send one prompt to several provider/model pairs concurrently.
+        
+        Returns one entry per target, in order: the response dictionary, or
+        the exception raised for that target.
+        """
+        def target_llm(provider: str, model: str) -> Callable[[], BaseLLM]:
+            def get_llm() -> BaseLLM:
+                self.validate_request(provider, model, application_name)
+                return _get_llm(provider, model, application_name, environment)
+            return get_llm
+        
+        try:
+            # An invalid or unconfigured target fails only its own slot
+            return _run_coroutine(_gather_responses(
+                [(target_llm(provider, model), prompt) for provider, model in targets],
+                self.settings.LLM.MAX_CONCURRENT_REQUESTS,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ))
+        except Exception:
+            logger.exception("LLM request failed")
+            st.error("An unexpected error occurred. Please check your configurations.")
+            return []
 
     def display_metrics(self, metadata: Dict[str, Any]):
         """Display basic metrics in the Streamlit app."""
@@ -409,34 +422,83 @@ class LLMInsightsHub:
 
     def display_detailed_metrics(self, metadata: Dict[str, Any]):
         """Display detailed metrics in the Streamlit app."""
+        # Plain highlighted JSON is much lighter than st.json's interactive tree
         with st.expander("Detailed Metrics"):
-            st.json(metadata)
+            st.code(orjson.dumps(metadata, default=str, option=orjson.OPT_INDENT_2).decode(), language="json")
     
-    def store_llm_call(self, prompt: str, response: Dict[str, Any]):
+    def store_llm_call(self, prompt: str, response: Dict[str, Any], timestamp: int):
         """Store LLM call in history."""
-        history_entry = {
-            "timestamp": datetime.now(),
-            "provider": response["metadata"]["model"].split("-")[0],
-            "model": response["metadata"]["model"],
-            "prompt": prompt[:100] + "..." if len(prompt) > 100 else prompt,
-            "total_tokens": response["metadata"]["tokens"]["total_tokens"],
-            "response_time": response["metadata"]["performance"]["response_time"],
-            "total_cost": response["metadata"]["costs"]["total_cost"],
-            "tokens_per_second": response["metadata"]["performance"]["tokens_per_second"]
-        }
+        metadata = response["metadata"]
+        history_entry = LLMCall(
+            timestamp=timestamp,
+            provider=metadata["provider"],
+            model=metadata["model"],
+            prompt_preview=prompt[:100] + "..." if len(prompt) > 100 else prompt,
+            prompt_len=len(prompt),
+            total_tokens=metadata["tokens"]["total_tokens"],
+            response_time=metadata["performance"]["response_time"],
+            total_cost=metadata["costs"]["total_cost"],
+            tokens_per_second=metadata["performance"]["tokens_per_second"],
+            cost_per_token=metadata["costs"]["total_cost"] / max(metadata["tokens"]["total_tokens"], 1)
+        )
+        
+        # Bounded deque drops the oldest call once 10 are stored; keep the
+        # per-provider totals in step with what the history holds
+        history = st.session_state.llm_history
+        if len(history) == history.maxlen:
+            self.update_provider_metrics(history[0], -1)
+        history.append(history_entry)
+        self.update_provider_metrics(history_entry, 1)
+        st.session_state.llm_history_version += 1
         
-        st.session_state.llm_history.append(history_entry)
-        if len(st.session_state.llm_history) > 10:
-            st.session_state.llm_history.pop(0)
+        # Session totals are running sums, so summaries never re-scan history
+        st.session_state.total_tokens += history_entry.total_tokens
+        st.session_state.total_cost += history_entry.total_cost
+        st.session_state.rt_sum += history_entry.response_time
+        st.session_state.rt_count += 1
+
+    def update_provider_metrics(self, call: LLMCall, sign: int):
+        """Add (sign=1) or remove (sign=-1) a call from the per-provider totals."""
+        metrics = st.session_state.provider_metrics
+        totals = metrics.setdefault(call.provider, {"calls": 0, "total_tokens": 0, "total_cost": 0.0})
+        totals["calls"] += sign
+        totals["total_tokens"] += sign * call.total_tokens
+        totals["total_cost"] += sign * call.total_cost
+        if not totals["calls"]:
+            del metrics[call.provider]
+
+    def history_df(self) -> "pd.DataFrame":
+        """Dashboard DataFrame, rebuilt only when a new call has been stored."""
+        # pandas is only loaded once the dashboard is opened
+        import pandas as pd
+        
+        version = st.session_state.llm_history_version
+        cached = st.session_state.history_df
+        if cached is None or cached[0] != version:
+            df = pd.DataFrame(list(st.session_state.llm_history))
+            local_tz = datetime.now().astimezone().tzinfo
+            df["timestamp"] = (
+                pd.to_datetime(df["timestamp"], unit="ns", utc=True)
+                .dt.tz_convert(local_tz)
+                .dt.tz_localize(None)
+            )
+            # Repeated labels are stored once per category
+            df = df.astype({"provider": "category", "model": "category"})
+            cached = (version, df)
+            st.session_state.history_df = cached
+        return cached[1]
 
     def render_dashboard(self):
         """Render the performance dashboard."""
+        # Plotly is only loaded once the dashboard is actually opened
+        from src.interface.dashboard import DashboardComponents
+        
         if not st.session_state.llm_history:
             st.info("No LLM calls recorded yet. Start chatting to see analytics!")
             return
         
         # Convert history to DataFrame
-        df = pd.DataFrame(st.session_state.llm_history)
+        df = self.history_df()
     
         # Create dashboard tabs
         overview_tab, cost_tab, perf_tab, history_tab = st.tabs([
@@ -447,7 +509,7 @@ class LLMInsightsHub:
         ])
     
         with overview_tab:
-            DashboardComponents.render_overview_tab(df)
+            DashboardComponents.render_overview_tab(df, st.session_state.provider_metrics)
         with cost_tab:
             DashboardComponents.render_cost_analysis_tab(df)
         with perf_tab:
@@ -462,14 +524,63 @@ class LLMInsightsHub:
             "Environment": st.session_state.environment,
             "Total Tokens": st.session_state.total_tokens,
             "Total Cost": f"${st.session_state.total_cost:.4f}",
-            "Average Response Time": (sum(st.session_state.response_times) / len(st.session_state.response_times)) if st.session_state.response_times else 0
+            "Average Response Time": (st.session_state.rt_sum / st.session_state.rt_count) if st.session_state.rt_count else 0
         }
-        summary_df = pd.DataFrame([summary])
-        st.sidebar.download_button("Download Summary", summary_df.to_csv(index=False), file_name="LLM_summary.csv", mime="text/csv")
+        st.sidebar.download_button(
+            "Download Summary",
+            data=_summary_csv(summary),
+            file_name="LLM_summary.csv",
+            mime="text/csv"
+        )
+
+    def record_response(self, prompt: str, response: Dict[str, Any], now: int):
+        """Store a response and show its metrics."""
+        self.store_llm_call(prompt, response, now)
+        self.display_metrics(response["metadata"])
+        self.display_detailed_metrics(response["metadata"])
+        st.session_state.messages.append({
+            "role": "assistant",
+            "content": response["response"],
+            "timestamp": now
+        })
+
+    def render_turn(self, prompt: str, response: Any, now: int):
+        """Render one prompt of a batch and its response or error."""
+        st.session_state.messages.append({
+            "role": "user",
+            "content": prompt,
+            "timestamp": now
+        })
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        with st.chat_message("assistant"):
+            if isinstance(response, Exception):
+                st.error(f"Request failed: {str(response)}")
+            else:
+                st.markdown(response["response"])
+                self.record_response(prompt, response, now)
+
+    def render_comparison(self, prompt: str, targets: List[Tuple[str, str]], responses: List[Any], now: int):
+        """Render one prompt and each provider's response or error."""
+        st.session_state.messages.append({
+            "role": "user",
+            "content": prompt,
+            "timestamp": now
+        })
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        for (provider, model), response in zip(targets, responses):
+            with st.chat_message("assistant"):
+                st.caption(f"{provider} | {model}")
+                if isinstance(response, Exception):
+                    st.error(f"Request failed: {str(response)}")
+                else:
+                    st.markdown(response["response"])
+                    self.record_response(prompt, response, now)
 
-    async def run_async(self):
-        """Run the Streamlit application asynchronously."""
-        provider, model, temperature, max_tokens, application_name, environment = self.render_sidebar()
+    def run(self):
+        """Entrypoint for the Streamlit application."""
+        provider, model, temperature, max_tokens, batch_mode, compare_mode, application_name, environment = self.render_sidebar()
     
         with st.sidebar:
             st.sidebar.divider()
@@ -491,48 +602,76 @@ class LLMInsightsHub:
         st.subheader("Chat Console")
         st.caption(f"Application: {application_name} | Environment: {environment} | Model: {model}")
         if prompt := st.chat_input("Enter your message...", disabled=not application_name):
-            st.session_state.messages.append({
-                "role": "user",
-                "content": prompt,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            })
-            with st.chat_message("user"):
-                st.markdown(prompt)
-            with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    response = await self.get_llm_response(
+            # One clock read per turn, shared by the messages and the history
+            # entry; stored as epoch ns and only formatted for display
+            now = time.time_ns()
+            prompts = [line for line in prompt.splitlines() if line.strip()] if batch_mode else []
+            if compare_mode:
+                targets = self.compare_targets(provider, model)
+                with st.spinner(f"Comparing {len(targets)} providers..."):
+                    responses = self.get_llm_responses_parallel(
+                        targets=targets,
+                        prompt=prompt,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        application_name=application_name,
+                        environment=environment
+                    )
+                self.render_comparison(prompt, targets, responses, now)
+            elif len(prompts) > 1:
+                with st.spinner(f"Sending {len(prompts)} prompts..."):
+                    responses = self.get_llm_responses_batch(
                         provider=provider,
                         model=model,
-                        prompt=prompt,
+                        prompts=prompts,
                         temperature=temperature,
                         max_tokens=max_tokens,
                         application_name=application_name,
                         environment=environment
                     )
-                self.store_llm_call(prompt, response)
-                st.markdown(response["response"])
-                self.display_metrics(response["metadata"])
-                self.display_detailed_metrics(response["metadata"])
-                st.session_state.total_tokens += response["metadata"]["tokens"]["total_tokens"]
-                st.session_state.total_cost += response["metadata"]["costs"]["total_cost"]
-                st.session_state.response_times.append(response["metadata"]["performance"]["response_time"])
+                for batch_prompt, response in zip(prompts, responses):
+                    self.render_turn(batch_prompt, response, now)
+            else:
                 st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response["response"],
-                    "metadata": response["metadata"],
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    "role": "user",
+                    "content": prompt,
+                    "timestamp": now
                 })
+                with st.chat_message("user"):
+                    st.markdown(prompt)
+                with st.chat_message("assistant"):
+                    # Only temperature 0 responses are deterministic enough to reuse
+                    key = _response_key(provider, model, temperature, max_tokens, prompt) if temperature == 0 else None
+                    cached = st.session_state.response_cache.get(key) if key else None
+                    if cached is not None:
+                        st.markdown(cached)
+                        st.caption("♻️ Served from session cache - no tokens used")
+                        st.session_state.messages.append({
+                            "role": "assistant",
+                            "content": cached,
+                            "timestamp": now
+                        })
+                    else:
+                        response = self.stream_llm_response(
+                            provider=provider,
+                            model=model,
+                            prompt=prompt,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            application_name=application_name,
+                            environment=environment
+                        )
+                        if not response.get("error"):
+                            if key:
+                                self.cache_response(key, response["response"])
+                            self.record_response(prompt, response, now)
         if st.session_state.messages:
             st.sidebar.divider()
             st.sidebar.subheader("Session Summary")
             st.sidebar.metric("Total Tokens Used", value=st.session_state.total_tokens)
             st.sidebar.metric("Total Cost", value=f"${st.session_state.total_cost:.4f}")
-            if st.session_state.response_times:
-                st.sidebar.metric("Average Response Time", value=f"{sum(st.session_state.response_times) / len(st.session_state.response_times):.2f}s")
-
-    def run(self):
-        """Entrypoint for the Streamlit application."""
-        asyncio.run(self.run_async())
+            if st.session_state.rt_count:
+                st.sidebar.metric("Average Response Time", value=f"{st.session_state.rt_sum / st.session_state.rt_count:.2f}s")
 
 if __name__ == "__main__":
     app = LLMInsightsHub()
@@ -2,27 +2,89 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from datetime import datetime
 
+# Figure builders are cached on the DataFrame contents, so reruns that don't
+# add a call (e.g. switching provider) reuse the figures instead of rebuilding
+@st.cache_data(show_spinner=False, max_entries=20)
+def _cost_trend_figure(df: pd.DataFrame) -> go.Figure:
+    """Cost over time per provider; WebGL traces fed NumPy arrays."""
+    fig = go.Figure()
+    for provider in df['provider'].unique():
+        provider_df = df[df['provider'] == provider]
+        fig.add_trace(go.Scattergl(
+            x=provider_df['timestamp'].to_numpy(),
+            y=provider_df['total_cost'].to_numpy(),
+            name=f"{provider} Cost",
+            mode='lines+markers'
+        ))
+    
+    fig.update_layout(
+        title="Cost Trends by Provider",
+        xaxis_title="Time",
+        yaxis_title="Cost ($)",
+        height=400
+    )
+    return fig
+
+@st.cache_data(show_spinner=False, max_entries=20)
+def _cost_figures(df: pd.DataFrame) -> Tuple[go.Figure, go.Figure]:
+    """Cost per model and cost per token bar charts."""
+    # Cost comparison
+    fig_cost = px.bar(
+        df,
+        x='model',
+        y='total_cost',
+        color='provider',
+        title="Cost per Model",
+        labels={'total_cost': 'Total Cost ($)'}
+    )
+    
+    # Cost per token
+    fig_token = px.bar(
+        df,
+        x='model',
+        y='cost_per_token',
+        color='provider',
+        title="Cost per Token",
+        labels={'cost_per_token': 'Cost per Token ($)'}
+    )
+    return fig_cost, fig_token
+
+@st.cache_data(show_spinner=False, max_entries=20)
+def _performance_figures(df: pd.DataFrame) -> Tuple[go.Figure, go.Figure]:
+    """Response time and processing speed distributions."""
+    # Response time comparison
+    fig_resp = px.box(
+        df,
+        x='model',
+        y='response_time',
+        color='provider',
+        title="Response Time Distribution"
+    )
+    
+    # Processing speed comparison
+    fig_speed = px.box(
+        df,
+        x='model',
+        y='tokens_per_second',
+        color='provider',
+        title="Processing Speed"
+    )
+    return fig_resp, fig_speed
+
 class DashboardComponents:
     """Dashboard components for LLM monitoring."""
     
     @staticmethod
-    def render_overview_tab(df: pd.DataFrame):
-        """Render overview metrics."""
+    def render_overview_tab(df: pd.DataFrame, provider_metrics: Dict[str, Dict[str, Any]]):
+        """Render overview metrics from the running per-provider totals."""
         st.subheader("Quick Stats")
         
-        # Provider-wise summary
-        provider_metrics = df.groupby('provider').agg({
-            'total_tokens': 'sum',
-            'total_cost': 'sum',
-            'response_time': 'mean'
-        }).round(4)
-        
         # Display metrics in columns
         cols = st.columns(len(provider_metrics))
-        for idx, (provider, metrics) in enumerate(provider_metrics.iterrows()):
+        for idx, (provider, metrics) in enumerate(sorted(provider_metrics.items())):
             with cols[idx]:
                 st.metric(
                     f"{provider}",
@@ -30,51 +92,22 @@ class DashboardComponents:
                     f"{metrics['total_tokens']} tokens"
                 )
         
-        # Cost trend chart
-        fig = go.Figure()
-        for provider in df['provider'].unique():
-            provider_df = df[df['provider'] == provider]
-            fig.add_trace(go.Scatter(
-                x=provider_df['timestamp'],
-                y=provider_df['total_cost'],
-                name=f"{provider} Cost",
-                mode='lines+markers'
-            ))
-        
-        fig.update_layout(
-            title="Cost Trends by Provider",
-            xaxis_title="Time",
-            yaxis_title="Cost ($)",
-            height=400
+        # Cost trend chart - a read-only snapshot, so skip hover/zoom wiring
+        # and Streamlit's theme pass
+        st.plotly_chart(
+            _cost_trend_figure(df),
+            use_container_width=True,
+            theme=None,
+            config={"staticPlot": True, "displayModeBar": False}
         )
-        st.plotly_chart(fig, use_container_width=True)
 
     @staticmethod
     def render_cost_analysis_tab(df: pd.DataFrame):
         """Render cost analysis."""
         st.subheader("Cost Analysis")
         
-        # Cost comparison
-        fig_cost = px.bar(
-            df,
-            x='model',
-            y='total_cost',
-            color='provider',
-            title="Cost per Model",
-            labels={'total_cost': 'Total Cost ($)'}
-        )
+        fig_cost, fig_token = _cost_figures(df)
         st.plotly_chart(fig_cost, use_container_width=True)
-        
-        # Cost per token
-        df['cost_per_token'] = df['total_cost'] / df['total_tokens']
-        fig_token = px.bar(
-            df,
-            x='model',
-            y='cost_per_token',
-            color='provider',
-            title="Cost per Token",
-            labels={'cost_per_token': 'Cost per Token ($)'}
-        )
         st.plotly_chart(fig_token, use_container_width=True)
 
     @staticmethod
@@ -82,28 +115,13 @@ class DashboardComponents:
         """Render performance metrics."""
         st.subheader("Performance Metrics")
         
+        fig_resp, fig_speed = _performance_figures(df)
         col1, col2 = st.columns(2)
         
         with col1:
-            # Response time comparison
-            fig_resp = px.box(
-                df,
-                x='model',
-                y='response_time',
-                color='provider',
-                title="Response Time Distribution"
-            )
             st.plotly_chart(fig_resp, use_container_width=True)
         
         with col2:
-            # Processing speed comparison
-            fig_speed = px.box(
-                df,
-                x='model',
-                y='tokens_per_second',
-                color='provider',
-                title="Processing Speed"
-            )
             st.plotly_chart(fig_speed, use_container_width=True)
 
     @staticmethod
@@ -111,18 +129,21 @@ class DashboardComponents:
         """Render call history."""
         st.subheader("Recent LLM Calls")
         
-        # Format DataFrame for display
-        display_df = df.copy()
-        display_df['timestamp'] = pd.to_datetime(display_df['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        
         # Select columns to display
         columns = [
-            'timestamp', 'provider', 'model', 'prompt',
+            'timestamp', 'provider', 'model', 'prompt_preview',
             'total_tokens', 'response_time', 'total_cost'
         ]
         
+        # Timestamps and raw float metrics are formatted by the frontend
         st.dataframe(
-            display_df[columns],
+            df[columns],
             use_container_width=True,
-            hide_index=True
+            hide_index=True,
+            column_config={
+                'timestamp': st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm:ss"),
+                'prompt_preview': st.column_config.TextColumn("prompt"),
+                'response_time': st.column_config.NumberColumn(format="%.3f s"),
+                'total_cost': st.column_config.NumberColumn(format="$%.6f")
+            }
         )
\ No newline at end of file
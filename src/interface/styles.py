@@ -0,0 +1,16 @@
+import re
+from pathlib import Path
+from typing import Final
+
+STYLES_PATH: Final[Path] = Path(__file__).parent / "styles.css"
+
+def minify_css(css: str) -> str:
+    """Strip comments and insignificant whitespace from a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+# Read once per process; the Streamlit script module re-executes on every
+# rerun, so the stylesheet lives here rather than in app.py
+PAGE_CSS: Final[str] = f"<style>{minify_css(STYLES_PATH.read_text(encoding='utf-8'))}</style>"
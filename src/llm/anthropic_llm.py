@@ -1,13 +1,20 @@
 # src/llm/anthropic_llm.py
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Optional, Union
 from anthropic import AsyncAnthropic, APIError
-import time
+from anthropic.types import Message, TextBlock
 import asyncio
-from datetime import datetime
+import threading
+import time
 from src.llm.base import BaseLLM, LLMException
 from src.config.settings import settings
 
+# One client (and connection pool) per API key, shared by every AnthropicLLM
+# instance; closed when the last instance using it is cleaned up
+_CLIENTS: Dict[str, AsyncAnthropic] = {}
+_CLIENT_REFS: Dict[str, int] = {}
+_CLIENTS_LOCK = threading.Lock()
+
 class AnthropicLLM(BaseLLM):
     """
     Anthropic LLM implementation with async support and comprehensive tracking.
@@ -20,27 +27,37 @@ class AnthropicLLM(BaseLLM):
     - Resource management
     """
     
+    __slots__ = ("client",)
+    
     def setup(self) -> None:
         """Initialize and configure the Anthropic client."""
         try:
-            # Initialize async client
-            self.client = AsyncAnthropic(
-                api_key=self.api_key
-            )
-            
             # Set default model if none provided
             self.model = self.model or "claude-3-haiku-20240307"
             
             # Validate model selection
-            if self.model not in settings.LLM.ANTHROPIC_MODELS:
+            if self.model not in settings.LLM.ANTHROPIC_MODELS_SET:
                 raise LLMException(
                     f"Invalid model: {self.model}. "
                     f"Choose from {settings.LLM.ANTHROPIC_MODELS}"
                 )
             
+            self.load_token_costs("anthropic")
+            
+            # Reuse the pooled async client (retries are handled by retry_request)
+            with _CLIENTS_LOCK:
+                if self.api_key not in _CLIENTS:
+                    _CLIENTS[self.api_key] = AsyncAnthropic(
+                        api_key=self.api_key,
+                        max_retries=0
+                    )
+                    _CLIENT_REFS[self.api_key] = 0
+                _CLIENT_REFS[self.api_key] += 1
+                self.client = _CLIENTS[self.api_key]
+            
             self.logger.info(
-                f"Anthropic client initialized [Session: {self.session_id}] "
-                f"[Model: {self.model}] [Environment: {self.environment}]"
+                "Anthropic client initialized [Session: %s] [Model: %s] [Environment: %s]",
+                self.session_id, self.model, self.environment
             )
                 
         except Exception as e:
@@ -49,11 +66,23 @@ class AnthropicLLM(BaseLLM):
             raise LLMException(error_msg)
     
     async def cleanup(self) -> None:
-        """Cleanup resources and close connections."""
+        """Release the shared client, closing it once no instance uses it."""
         try:
             if hasattr(self, 'client'):
-                await self.client.close()
-                self.logger.info(f"Cleaned up Anthropic client [Session: {self.session_id}]")
+                with _CLIENTS_LOCK:
+                    _CLIENT_REFS[self.api_key] -= 1
+                    last_user = _CLIENT_REFS[self.api_key] == 0
+                    if last_user:
+                        del _CLIENTS[self.api_key], _CLIENT_REFS[self.api_key]
+                client = self.client
+                del self.client
+                if last_user:
+                    # Shielded so a cancelled caller does not leave the pool's sockets open
+                    await asyncio.wait_for(
+                        asyncio.shield(client.close()),
+                        timeout=settings.LLM.CLIENT_CLOSE_TIMEOUT_SEC
+                    )
+                self.logger.info("Cleaned up Anthropic client [Session: %s]", self.session_id)
         except Exception as e:
             self.logger.error(f"Error during cleanup: {str(e)} [Session: {self.session_id}]")
             
@@ -64,73 +93,131 @@ class AnthropicLLM(BaseLLM):
                               **kwargs) -> Dict[str, Any]:
         """Generate a response using Anthropic's API."""
         try:
-            start_time = time.time()
+            # Serve repeated deterministic requests from the cache
+            cache_key = self.cache_key(prompt, temperature, max_tokens, **kwargs)
+            if cached := await self.cached_response(cache_key, prompt):
+                return cached
+            
+            start_time = time.perf_counter()
             
             # Make API call with retry logic
-            for attempt in range(settings.LLM.DEFAULT_PARAMETERS["retry_attempts"]):
-                try:
-                    response = await self.client.messages.create(
-                        model=self.model,
-                        max_tokens=max_tokens,
-                        temperature=temperature,
-                        messages=[
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        **kwargs
-                    )
-                    break
-                except APIError as e:
-                    if attempt == settings.LLM.DEFAULT_PARAMETERS["retry_attempts"] - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)
+            response, attempt = await self.retry_request(
+                lambda: self.client.messages.create(
+                    model=self.model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    **kwargs
+                ),
+                APIError
+            )
             
-            end_time = time.time()
+            end_time = time.perf_counter()
             response_time = end_time - start_time
             
-            # Calculate costs
-            model_costs = settings.get_model_cost("anthropic", self.model)
-            input_cost = (response.usage.input_tokens / 1000) * model_costs["input"]
-            output_cost = (response.usage.output_tokens / 1000) * model_costs["output"]
-            total_cost = input_cost + output_cost
-            
-            result = {
-                "response": response.content[0].text,
-                "metadata": {
-                    "model": self.model,
-                    "tokens": {
-                        "prompt_tokens": response.usage.input_tokens,
-                        "completion_tokens": response.usage.output_tokens,
-                        "total_tokens": response.usage.input_tokens + response.usage.output_tokens
-                    },
-                    "costs": {
-                        "input_cost": round(input_cost, 6),
-                        "output_cost": round(output_cost, 6),
-                        "total_cost": round(total_cost, 6)
-                    },
-                    "performance": {
-                        "response_time": round(response_time, 3),
-                        "tokens_per_second": round(
-                            (response.usage.input_tokens + response.usage.output_tokens) / response_time, 
-                            2
-                        ),
-                        "retry_count": attempt
-                    },
-                    "session_info": self.get_session_info(),
-                    "completion_info": {
-                        "stop_reason": response.stop_reason,
-                        "created": datetime.now().isoformat()
-                    }
+            return await self._complete(prompt, response, response_time, attempt, cache_key)
+            
+        except APIError as e:
+            error_msg = f"Anthropic API error: {str(e)}"
+            self.logger.error(f"{error_msg} [Session: {self.session_id}]")
+            raise LLMException(error_msg)
+        except Exception as e:
+            error_msg = f"Unexpected error: {str(e)}"
+            self.logger.error(f"{error_msg} [Session: {self.session_id}]")
+            raise LLMException(error_msg)
+            
+    async def _complete(self,
+                        prompt: str,
+                        response: Message,
+                        response_time: float,
+                        attempt: int,
+                        cache_key: Optional[str]) -> Dict[str, Any]:
+        """Build, validate, cache and log the result dict for a finished message."""
+        usage = response.usage
+        total_tokens = usage.input_tokens + usage.output_tokens
+        
+        # Calculate costs
+        input_cost = usage.input_tokens * self._input_cost_per_token
+        output_cost = usage.output_tokens * self._output_cost_per_token
+        total_cost = input_cost + output_cost
+        
+        result = {
+            "response": "".join(block.text for block in response.content if isinstance(block, TextBlock)),
+            "metadata": {
+                "provider": "anthropic",
+                "model": self.model,
+                "tokens": {
+                    "prompt_tokens": usage.input_tokens,
+                    "completion_tokens": usage.output_tokens,
+                    "total_tokens": total_tokens
+                },
+                "costs": {
+                    "input_cost": input_cost,
+                    "output_cost": output_cost,
+                    "total_cost": total_cost
+                },
+                "performance": {
+                    "response_time": response_time,
+                    "tokens_per_second": total_tokens / response_time,
+                    "retry_count": attempt
+                },
+                "session_info": self.get_session_info(),
+                "completion_info": {
+                    "stop_reason": response.stop_reason,
+                    "created_unix": time.time()
                 }
             }
+        }
+        
+        # Validate response format; a developer check, so only in DEBUG (never under python -O)
+        if __debug__ and settings.DEBUG and not self.validate_response(result):
+            raise LLMException("Invalid response format from Anthropic")
+        
+        if cache_key and self.cache is not None:
+            await self.cache.set(cache_key, result, prompt)
+        
+        self.log_interaction(prompt, result)
+        return result
+            
+    async def stream_response(self,
+                              prompt: str,
+                              temperature: float = settings.LLM.DEFAULT_PARAMETERS["temperature"],
+                              max_tokens: int = settings.LLM.DEFAULT_PARAMETERS["max_tokens"],
+                              **kwargs) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+        """
+        Stream a response using Anthropic's streaming Messages API.
+        
+        Text deltas are yielded as they arrive, followed by the result dict
+        built from the final message. Streams are not retried, since a retry
+        after partial output would repeat text the caller already received.
+        """
+        try:
+            cache_key = self.cache_key(prompt, temperature, max_tokens, **kwargs)
+            if cached := await self.cached_response(cache_key, prompt):
+                yield cached["response"]
+                yield cached
+                return
             
-            if not self.validate_response(result):
-                raise LLMException("Invalid response format from Anthropic")
+            start_time = time.perf_counter()
+            request_params: Dict[str, Any] = {
+                "model": self.model,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "messages": [{"role": "user", "content": prompt}],
+                **kwargs
+            }
+            async with self.client.messages.stream(**request_params) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                response = await stream.get_final_message()
+            response_time = time.perf_counter() - start_time
             
-            self.log_interaction(prompt, result)
-            return result
+            yield await self._complete(prompt, response, response_time, 0, cache_key)
             
         except APIError as e:
             error_msg = f"Anthropic API error: {str(e)}"
@@ -1,12 +1,21 @@
 # src/llm/base.py
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional, Set, Tuple, Type, Union
+import asyncio
 import logging
+import orjson
+import random
 import time
 import uuid
 from datetime import datetime
 from src.config.settings import settings
+from src.llm.cache import LLMCache
+from src.llm.rate_limit import TokenBucket
+
+# Keys every generate_response result must contain
+REQUIRED_RESPONSE_KEYS = frozenset({"response", "metadata"})
 
 class LLMException(Exception):
     """
@@ -19,6 +28,45 @@ class LLMException(Exception):
     """
     pass
 
+class GenerationBuffer:
+    """
+    Request queue of one buffered_generation() block.
+    
+    Each block gets its own buffer, so blocks running concurrently on a shared
+    LLM instance never dispatch or flush each other's requests.
+    """
+    
+    __slots__ = ("_queue", "_open")
+    
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._open = True
+        
+    def try_generate(self, prompt: str, **kwargs) -> asyncio.Future:
+        """
+        Queue a prompt for the next batch and return a future for its result.
+        
+        Args:
+            prompt (str): The input text to send to the LLM
+            **kwargs: Parameters forwarded to generate_response
+            
+        Returns:
+            asyncio.Future: Resolves to the generate_response result or its exception
+            
+        Raises:
+            LLMException: If the buffered_generation() block has already exited
+        """
+        if not self._open:
+            raise LLMException("try_generate() requires an active buffered_generation() block")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((prompt, kwargs, future))
+        return future
+        
+    def close(self) -> None:
+        """Stop accepting requests; the worker flushes what is queued and exits."""
+        self._open = False
+        self._queue.put_nowait(None)
+
 class BaseLLM(ABC):
     """
     Abstract base class for Large Language Model implementations.
@@ -34,6 +82,7 @@ class BaseLLM(ABC):
         environment (str): Environment where the LLM is running (e.g., 'dev', 'prod')
         logger (logging.Logger): Logger instance for this class
         created_at (datetime): Timestamp when the instance was created
+        cache (Optional[LLMCache]): Response cache for deterministic requests
         
     Usage:
         class OpenAILLM(BaseLLM):
@@ -42,11 +91,19 @@ class BaseLLM(ABC):
                 pass
     """
     
+    # Fixed attribute layout: no per-instance __dict__; subclasses add their own slots
+    __slots__ = (
+        "api_key", "model", "cache", "session_id", "application_id", "environment",
+        "created_at", "_static_session", "total_requests", "total_tokens", "total_cost",
+        "logger", "_input_cost_per_token", "_output_cost_per_token"
+    )
+    
     def __init__(self, 
                  api_key: str, 
                  model: Optional[str] = None,
                  application_id: Optional[str] = None,
-                 environment: str = "development"):
+                 environment: str = "development",
+                 cache: Optional[LLMCache] = None):
         """
         Initialize the LLM instance with tracking capabilities.
         
@@ -55,6 +112,7 @@ class BaseLLM(ABC):
             model (Optional[str]): Specific model to use. If None, a default will be used
             application_id (Optional[str]): Identifier for the calling application
             environment (str): Runtime environment (development/staging/production)
+            cache (Optional[LLMCache]): Cache for temperature-0 responses; None disables caching
             
         Raises:
             LLMException: If api_key is empty or invalid
@@ -70,6 +128,7 @@ class BaseLLM(ABC):
         # Store initialization parameters
         self.api_key = api_key
         self.model = model
+        self.cache = cache
         
         # Generate and store tracking identifiers
         self.session_id = str(uuid.uuid4())
@@ -77,6 +136,14 @@ class BaseLLM(ABC):
         self.environment = environment
         self.created_at = datetime.now()
         
+        # Session identity never changes, so it is built once for get_session_info()
+        self._static_session = {
+            "session_id": self.session_id,
+            "application_id": self.application_id,
+            "environment": self.environment,
+            "created_at": self.created_at.isoformat()
+        }
+        
         # Initialize interaction tracking
         self.total_requests = 0
         self.total_tokens = 0
@@ -85,8 +152,8 @@ class BaseLLM(ABC):
         # Set up logging with context
         self.logger = logging.getLogger(f"{__name__}.{self.session_id}")
         self.logger.debug(
-            f"Initializing {self.__class__.__name__} "
-            f"[Session: {self.session_id}, App: {self.application_id}, Env: {self.environment}]"
+            "Initializing %s [Session: %s, App: %s, Env: %s]",
+            self.__class__.__name__, self.session_id, self.application_id, self.environment
         )
         
         # Validate API key
@@ -116,6 +183,15 @@ class BaseLLM(ABC):
         """
         pass
         
+    async def cleanup(self) -> None:
+        """
+        Release the provider client and its connections.
+        
+        Providers holding network resources override this; the default has
+        nothing to release.
+        """
+        pass
+        
     @abstractmethod
     async def generate_response(self, 
                               prompt: str,
@@ -136,6 +212,7 @@ class BaseLLM(ABC):
                 - response (str): The generated text
                 - metadata (dict): Additional information including:
                     - tokens (dict): Token usage statistics
+                    - provider (str): Provider that served the request
                     - model (str): Model used
                     - response_time (float): Time taken to generate
                     - finish_reason (str): Why the generation stopped
@@ -143,6 +220,244 @@ class BaseLLM(ABC):
         """
         pass
         
+    def load_token_costs(self, provider: str) -> None:
+        """
+        Resolve the model's per-token prices once, for use on every response.
+        
+        Called from setup() after the model is validated; pricing in the cost
+        table is per 1K tokens.
+        
+        Raises:
+            LLMException: If no pricing is configured for the model
+        """
+        model_costs = settings.get_model_cost(provider, self.model)
+        if not model_costs:
+            raise LLMException(f"No pricing configured for {provider} model {self.model}")
+        self._input_cost_per_token = model_costs["input"] / 1000
+        self._output_cost_per_token = model_costs["output"] / 1000
+        
+    def estimate_tokens(self, text: str) -> int:
+        """
+        Estimate how many tokens text uses, for client-side rate limiting.
+        
+        The default is the ~4 characters per token rule of thumb; providers
+        with a local tokenizer override this with an exact count.
+        """
+        return len(text) // 4
+        
+    def cache_key(self,
+                  prompt: str,
+                  temperature: float,
+                  max_tokens: int,
+                  **kwargs) -> Optional[str]:
+        """
+        Cache key for a request, or None when it must not be cached.
+        
+        Requests are only cached when a cache is configured and temperature is
+        0, since sampled completions are expected to differ between calls.
+        """
+        if self.cache is None or self.model is None or temperature > 0:
+            return None
+        return self.cache.make_key(self.model, prompt, temperature, max_tokens, **kwargs)
+        
+    async def cached_response(self, cache_key: Optional[str], prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        The cached result for a request, or None on a miss.
+        
+        A hit spends nothing, so its metadata is marked cached and its costs and
+        token counts are zeroed; callers summing spend then only count real calls.
+        """
+        if cache_key is None or self.cache is None:
+            return None
+        result = await self.cache.get(cache_key, prompt)
+        if result is None:
+            return None
+        metadata = result["metadata"]
+        metadata["cached"] = True
+        metadata["costs"] = dict.fromkeys(metadata["costs"], 0.0)
+        metadata["tokens"] = dict.fromkeys(metadata["tokens"], 0)
+        return result
+        
+    @staticmethod
+    def _is_retriable(error: Exception) -> bool:
+        """
+        Whether a provider error is worth retrying.
+        
+        Rate limits (429) and server errors (5xx) are; other HTTP errors such
+        as a bad key or request (400/401/404) fail the same way every time.
+        Errors without a status code (timeouts, dropped connections) are retried.
+        """
+        status = getattr(error, "status_code", None)
+        return status is None or status == 429 or status >= 500
+        
+    async def retry_request(self,
+                            request: Callable[[], Awaitable[Any]],
+                            retry_on: Type[Exception]) -> Tuple[Any, int]:
+        """
+        Await a provider API call, retrying failures with full-jitter backoff.
+        
+        This is the only retry layer: provider clients are created with their
+        built-in retries disabled so attempts don't multiply. Each wait is drawn
+        uniformly from [0, min(cap, base * 2**attempt)] so concurrent callers
+        don't retry in lockstep.
+        
+        Args:
+            request (Callable[[], Awaitable[Any]]): Starts a fresh API call
+            retry_on (Type[Exception]): Provider error type that triggers a retry
+            
+        Returns:
+            Tuple[Any, int]: The API response and the number of retries used
+        """
+        last_attempt = max(settings.LLM.DEFAULT_PARAMETERS["retry_attempts"], 1) - 1
+        for attempt in range(last_attempt):
+            try:
+                return await request(), attempt
+            except retry_on as e:
+                if not self._is_retriable(e):
+                    raise
+                await asyncio.sleep(random.uniform(
+                    0, min(settings.LLM.RETRY_CAP_SEC, settings.LLM.RETRY_BASE_SEC * 2 ** attempt)
+                ))
+        # Final attempt: its error propagates to the caller
+        return await request(), last_attempt
+        
+    async def stream_response(self,
+                              prompt: str,
+                              temperature: float = settings.LLM.DEFAULT_PARAMETERS["temperature"],
+                              max_tokens: int = settings.LLM.DEFAULT_PARAMETERS["max_tokens"],
+                              **kwargs) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+        """
+        Stream a response from the LLM.
+        
+        Yields text chunks as they become available, followed by the complete
+        response dictionary (same shape as generate_response) as the last item.
+        Providers with a streaming API override this; the default yields the
+        whole text in one chunk.
+        
+        Args:
+            prompt (str): The input text to send to the LLM
+            temperature (float): Controls randomness in generation (0.0 to 1.0)
+            max_tokens (int): Maximum number of tokens to generate
+            **kwargs: Additional model-specific parameters
+        """
+        result = await self.generate_response(
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        yield result["response"]
+        yield result
+        
+    async def generate_many(self,
+                            prompts: List[str],
+                            max_concurrency: int = settings.LLM.MAX_CONCURRENT_REQUESTS,
+                            rpm: int = settings.LLM.RATE_LIMIT_RPM,
+                            tpm: int = settings.LLM.RATE_LIMIT_TPM,
+                            temperature: float = settings.LLM.DEFAULT_PARAMETERS["temperature"],
+                            max_tokens: int = settings.LLM.DEFAULT_PARAMETERS["max_tokens"],
+                            **kwargs) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Generate responses for many prompts concurrently within rate limits.
+        
+        At most max_concurrency requests are in flight, and token buckets keep
+        the request and estimated token rates under rpm/tpm so a large fan-out
+        does not run into 429s. Tokens per request are estimated as
+        estimate_tokens(prompt) + max_tokens.
+        
+        Args:
+            prompts (List[str]): Input texts, one request each
+            max_concurrency (int): Most requests in flight at once
+            rpm (int): Requests per minute allowed
+            tpm (int): Tokens per minute allowed
+            temperature (float): Controls randomness in generation (0.0 to 1.0)
+            max_tokens (int): Maximum number of tokens to generate per request
+            **kwargs: Additional model-specific parameters
+            
+        Returns:
+            List[Union[Dict[str, Any], BaseException]]: Results in prompt order;
+                a failed request's exception takes its place
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        requests = TokenBucket(capacity=rpm, rate=rpm / 60)
+        tokens = TokenBucket(capacity=tpm, rate=tpm / 60)
+        
+        async def generate(prompt: str) -> Dict[str, Any]:
+            async with semaphore:
+                await requests.acquire()
+                await tokens.acquire(self.estimate_tokens(prompt) + max_tokens)
+                return await self.generate_response(
+                    prompt, temperature=temperature, max_tokens=max_tokens, **kwargs
+                )
+        
+        return await asyncio.gather(*(generate(prompt) for prompt in prompts), return_exceptions=True)
+        
+    @asynccontextmanager
+    async def buffered_generation(self,
+                                  max_batch: int = settings.LLM.BATCH_MAX_SIZE,
+                                  flush_interval: float = settings.LLM.BATCH_FLUSH_INTERVAL_SEC
+                                  ) -> AsyncIterator[GenerationBuffer]:
+        """
+        Coalesce prompts submitted to the yielded buffer into concurrent batches.
+        
+        A background worker collects requests until max_batch are queued or
+        flush_interval seconds pass, then dispatches the batch at once. Pending
+        requests are flushed and awaited when the block exits.
+        
+        Args:
+            max_batch (int): Most requests dispatched together
+            flush_interval (float): Longest a request waits for its batch to fill
+            
+        Example:
+            >>> async with llm.buffered_generation() as buffer:
+            ...     futures = [buffer.try_generate(p) for p in prompts]
+            >>> results = [f.result() for f in futures]
+        """
+        buffer = GenerationBuffer()
+        worker = asyncio.create_task(self._drain_buffer(buffer._queue, max_batch, flush_interval))
+        try:
+            yield buffer
+        finally:
+            buffer.close()  # Flushes the last batch and stops the worker
+            await worker
+            
+    async def _drain_buffer(self, queue: asyncio.Queue, max_batch: int, flush_interval: float) -> None:
+        """Group queued requests into batches and dispatch each without waiting on the last."""
+        loop = asyncio.get_running_loop()
+        dispatched: Set[asyncio.Task] = set()
+        done = False
+        while not done:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + flush_interval
+            while len(batch) < max_batch:
+                try:
+                    item = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            dispatched.add(asyncio.create_task(self._dispatch_batch(batch)))
+        await asyncio.gather(*dispatched)
+        
+    async def _dispatch_batch(self, batch: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> None:
+        """Run one batch concurrently and resolve each request's future."""
+        results = await asyncio.gather(
+            *(self.generate_response(prompt, **kwargs) for prompt, kwargs, _ in batch),
+            return_exceptions=True
+        )
+        for (_, _, future), result in zip(batch, results):
+            if future.cancelled():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        
     def log_interaction(self, prompt: str, response: Dict[str, Any]) -> None:
         """
         Log details of an LLM interaction with enhanced tracking.
@@ -157,12 +472,23 @@ class BaseLLM(ABC):
             self.total_tokens += response.get('metadata', {}).get('tokens', {}).get('total_tokens', 0)
             self.total_cost += response.get('metadata', {}).get('costs', {}).get('total_cost', 0.0)
             
-            # Create timestamp for the log
-            timestamp = datetime.now().isoformat()
+            # Skip building and serializing the record when INFO is filtered out
+            if not self.logger.isEnabledFor(logging.INFO):
+                return
+            
+            # Only every LOG_SAMPLE_RATE-th interaction is logged in full; the
+            # rest log just the running totals
+            if self.total_requests % settings.LLM.LOG_SAMPLE_RATE:
+                self.logger.info(
+                    "Interaction metrics: requests=%d tokens=%d cost=%.6f",
+                    self.total_requests, self.total_tokens, self.total_cost
+                )
+                return
             
-            # Prepare interaction details with tracking information
+            # Prepare interaction details with tracking information; the epoch
+            # timestamp is only rendered as text when orjson serializes it
             interaction = {
-                "timestamp": timestamp,
+                "timestamp": time.time(),
                 "session_id": self.session_id,
                 "application_id": self.application_id,
                 "environment": self.environment,
@@ -176,8 +502,10 @@ class BaseLLM(ABC):
                 }
             }
             
-            # Log the interaction
-            self.logger.info(f"Interaction logged: {interaction}")
+            # Log the interaction as compact JSON
+            self.logger.info(
+                "Interaction logged: %s", orjson.dumps(interaction, default=str).decode()
+            )
             
         except Exception as e:
             self.logger.error(f"Error logging interaction: {str(e)}")
@@ -192,8 +520,7 @@ class BaseLLM(ABC):
         Returns:
             bool: True if response is valid, False otherwise
         """
-        required_keys = {"response", "metadata"}
-        return all(key in response for key in required_keys)
+        return REQUIRED_RESPONSE_KEYS <= response.keys()
         
     def get_session_info(self) -> Dict[str, Any]:
         """
@@ -212,10 +539,7 @@ class BaseLLM(ABC):
             >>> print(f"Total cost for session: ${session_info['metrics']['total_cost']}")
         """
         return {
-            "session_id": self.session_id,
-            "application_id": self.application_id,
-            "environment": self.environment,
-            "created_at": self.created_at.isoformat(),
+            **self._static_session,
             "metrics": {
                 "total_requests": self.total_requests,
                 "total_tokens": self.total_tokens,
@@ -0,0 +1,178 @@
+# src/llm/cache.py
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Any, Callable, Optional, Sequence
+import asyncio
+import copy
+import hashlib
+import re
+import orjson
+from src.config.settings import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+class LLMCache:
+    """
+    In-memory LRU cache of generated responses.
+
+    Only deterministic requests (temperature 0) are worth caching: the same
+    prompt, model and parameters then always produce the same completion, so
+    a hit saves the full round trip and its token cost.
+
+    The get/set methods are async so a shared backend (e.g. Redis) can be
+    swapped in without changing callers. Results are copied on the way in
+    and out, so callers may freely mutate what they get back.
+
+    Usage:
+        cache = LLMCache()
+        llm = OpenAILLM(api_key="sk-...", cache=cache)
+    """
+
+    def __init__(self, max_entries: int = settings.LLM.RESPONSE_CACHE_SIZE):
+        """
+        Args:
+            max_entries (int): Number of responses kept before the least
+                recently used one is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int, **kwargs) -> str:
+        """
+        Build a stable key from everything that shapes the completion.
+
+        The key is "<scope>:<prompt>", two SHA-256 digests: one over the model
+        and parameters, one over the prompt. Requests sharing a scope can be
+        compared by prompt similarity (see SemanticCache).
+        """
+        scope = orjson.dumps(
+            {"m": model, "t": temperature, "mt": max_tokens, "kw": kwargs},
+            option=orjson.OPT_SORT_KEYS,
+            default=str
+        )
+        return (
+            f"{hashlib.sha256(scope).hexdigest()}:"
+            f"{hashlib.sha256(prompt.encode()).hexdigest()}"
+        )
+
+    async def get(self, key: str, prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None on a miss."""
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(result)
+
+    async def set(self, key: str, result: Dict[str, Any], prompt: Optional[str] = None) -> None:
+        """Store a response, evicting the least recently used entry when full."""
+        self._entries[key] = copy.deepcopy(result)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SemanticCache(LLMCache):
+    """
+    LLMCache with a second, similarity-based tier for paraphrased prompts.
+
+    On an exact miss the prompt is embedded and compared (cosine similarity)
+    with the cached prompts of the same model and parameters; the closest
+    response is returned when it clears the threshold. Prompts containing
+    digits skip this tier, since numbers, IDs and dates change the answer
+    while barely moving the embedding.
+
+    The embedding function is supplied by the caller (e.g. a fastembed or
+    sentence-transformers model's encode) and runs in a worker thread.
+
+    Usage:
+        cache = SemanticCache(embed=lambda text: model.encode(text))
+        llm = OpenAILLM(api_key="sk-...", cache=cache)
+    """
+
+    EXACT_ONLY_PATTERN = re.compile(r"\d")
+
+    def __init__(self,
+                 embed: Callable[[str], Sequence[float]],
+                 threshold: float = settings.LLM.SEMANTIC_CACHE_THRESHOLD,
+                 max_entries: int = settings.LLM.RESPONSE_CACHE_SIZE):
+        """
+        Args:
+            embed (Callable[[str], Sequence[float]]): Maps a prompt to its embedding
+            threshold (float): Minimum cosine similarity for a semantic hit
+            max_entries (int): Number of responses kept before LRU eviction
+        """
+        super().__init__(max_entries)
+        self.embed = embed
+        self.threshold = threshold
+        self.semantic_hits = 0
+        self._vectors: Dict[str, "np.ndarray"] = {}
+
+    async def _embed(self, prompt: str) -> "np.ndarray":
+        # numpy is only needed (and imported) once semantic caching is in use
+        import numpy as np
+        vector = np.asarray(await asyncio.to_thread(self.embed, prompt), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    async def get(self, key: str, prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return the exact match for key, else the most similar cached prompt's response."""
+        result = await super().get(key)
+        if result is not None or prompt is None or self.EXACT_ONLY_PATTERN.search(prompt):
+            return result
+        
+        scope = key.partition(":")[0]
+        if not any(k.partition(":")[0] == scope for k in self._vectors):
+            return None
+        
+        query = await self._embed(prompt)
+        # Collected after the await, since a concurrent set() may have evicted entries meanwhile
+        candidates = [k for k in self._vectors if k.partition(":")[0] == scope]
+        if not candidates:
+            return None
+        
+        import numpy as np
+        similarities = np.stack([self._vectors[k] for k in candidates]) @ query
+        best = int(similarities.argmax())
+        if similarities[best] < self.threshold:
+            return None
+        result = self._entries.get(candidates[best])
+        if result is None:
+            return None
+        
+        # Counted as a semantic hit rather than the exact miss recorded above
+        self.misses -= 1
+        self.semantic_hits += 1
+        self._entries.move_to_end(candidates[best])
+        return copy.deepcopy(result)
+
+    async def set(self, key: str, result: Dict[str, Any], prompt: Optional[str] = None) -> None:
+        """Store a response and, when eligible, its prompt embedding."""
+        # Embed first: inserting only after the await keeps _vectors and
+        # _entries in step even when another set() runs in the meantime
+        vector = None
+        if prompt is not None and not self.EXACT_ONLY_PATTERN.search(prompt):
+            vector = await self._embed(prompt)
+        
+        oldest = next(iter(self._entries), None)
+        await super().set(key, result)
+        if oldest is not None and oldest not in self._entries:
+            self._vectors.pop(oldest, None)
+        if vector is not None:
+            self._vectors[key] = vector
+
+    def clear(self) -> None:
+        """Drop all cached responses and embeddings."""
+        super().clear()
+        self._vectors.clear()
@@ -1,13 +1,58 @@
 # src/llm/openai_llm.py
 
-from typing import Dict, Any, Optional
-from openai import AsyncOpenAI, OpenAIError
-import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, List, Optional, Tuple, Union
+from openai import AsyncOpenAI, AsyncStream, APIStatusError, DefaultAsyncHttpxClient, OpenAIError
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
 import asyncio
-from datetime import datetime
+import importlib.util
+import logging
+import orjson
+import threading
+import time
 from src.llm.base import BaseLLM, LLMException
+from src.llm.rate_limit import RateLimitState
 from src.config.settings import settings
 
+if TYPE_CHECKING:
+    import tiktoken
+
+# Batch API states that mean the batch is still being processed
+PENDING_BATCH_STATUSES = frozenset({"validating", "in_progress", "finalizing"})
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2_AVAILABLE = settings.LLM.OPENAI_HTTP2 and importlib.util.find_spec("h2") is not None
+
+@lru_cache(maxsize=None)
+def _encoding_for(model: str) -> Optional["tiktoken.Encoding"]:
+    """
+    The model's tiktoken encoding, or None when tiktoken is not installed or
+    its encoding files cannot be loaded (they are downloaded on first use).
+    Looked up once per model per process, including failures.
+    """
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.getLogger(__name__).warning(
+            "Exact token counting unavailable for %s, estimating instead: %s", model, e
+        )
+        return None
+
+
+# One client (and connection pool) per API key and timeout, shared by every
+# OpenAILLM instance; closed when the last instance using it is cleaned up
+_CLIENTS: Dict[Tuple[str, float], AsyncOpenAI] = {}
+_CLIENT_REFS: Dict[Tuple[str, float], int] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+# Quota last reported by OpenAI's rate-limit headers, per API key
+_RATE_LIMITS: Dict[str, RateLimitState] = {}
+
 class OpenAILLM(BaseLLM):
     """
     OpenAI LLM implementation with async support and comprehensive tracking.
@@ -28,6 +73,8 @@ class OpenAILLM(BaseLLM):
         environment (str): Runtime environment
     """
     
+    __slots__ = ("client", "_client_key", "_rate_limit")
+    
     def setup(self) -> None:
         """
         Initialize and configure the OpenAI client.
@@ -38,25 +85,43 @@ class OpenAILLM(BaseLLM):
             LLMException: If initialization fails or model is invalid
         """
         try:
-            # Initialize async client
-            self.client = AsyncOpenAI(
-                api_key=self.api_key,
-                timeout=settings.LLM.DEFAULT_PARAMETERS["timeout"]
-            )
-            
             # Set default model if none provided
             self.model = self.model or "gpt-3.5-turbo"
             
             # Validate model selection
-            if self.model not in settings.LLM.OPENAI_MODELS:
+            if self.model not in settings.LLM.OPENAI_MODELS_SET:
                 raise LLMException(
                     f"Invalid model: {self.model}. "
                     f"Choose from {settings.LLM.OPENAI_MODELS}"
                 )
             
+            self.load_token_costs("openai")
+            # Load the tokenizer here rather than on the first request: tiktoken
+            # may download it, which would stall the event loop serving requests
+            _encoding_for(self.model)
+            
+            # Reuse the pooled async client (retries are handled by retry_request)
+            client_key = (self.api_key, settings.LLM.DEFAULT_PARAMETERS["timeout"])
+            with _CLIENTS_LOCK:
+                if client_key not in _CLIENTS:
+                    _CLIENTS[client_key] = AsyncOpenAI(
+                        api_key=self.api_key,
+                        timeout=settings.LLM.DEFAULT_PARAMETERS["timeout"],
+                        max_retries=0,
+                        # Multiplex concurrent requests over one connection when h2 is available
+                        http_client=DefaultAsyncHttpxClient(http2=True) if HTTP2_AVAILABLE else None
+                    )
+                    _CLIENT_REFS[client_key] = 0
+                _CLIENT_REFS[client_key] += 1
+                self.client = _CLIENTS[client_key]
+                # Released under the same key even if the timeout setting changes later
+                self._client_key = client_key
+            
+            self._rate_limit = _RATE_LIMITS.setdefault(self.api_key, RateLimitState())
+            
             self.logger.info(
-                f"OpenAI client initialized [Session: {self.session_id}] "
-                f"[Model: {self.model}] [Environment: {self.environment}]"
+                "OpenAI client initialized [Session: %s] [Model: %s] [Environment: %s]",
+                self.session_id, self.model, self.environment
             )
                 
         except Exception as e:
@@ -66,13 +131,26 @@ class OpenAILLM(BaseLLM):
     
     async def cleanup(self) -> None:
         """
-        Cleanup resources and close connections.
+        Release the shared client, closing it once no instance uses it.
         Should be called when the LLM instance is no longer needed.
         """
         try:
             if hasattr(self, 'client'):
-                await self.client.close()
-                self.logger.info(f"Cleaned up OpenAI client [Session: {self.session_id}]")
+                client_key = self._client_key
+                with _CLIENTS_LOCK:
+                    _CLIENT_REFS[client_key] -= 1
+                    last_user = _CLIENT_REFS[client_key] == 0
+                    if last_user:
+                        del _CLIENTS[client_key], _CLIENT_REFS[client_key]
+                client = self.client
+                del self.client
+                if last_user:
+                    # Shielded so a cancelled caller does not leave the pool's sockets open
+                    await asyncio.wait_for(
+                        asyncio.shield(client.close()),
+                        timeout=settings.LLM.CLIENT_CLOSE_TIMEOUT_SEC
+                    )
+                self.logger.info("Cleaned up OpenAI client [Session: %s]", self.session_id)
         except Exception as e:
             self.logger.error(f"Error during cleanup: {str(e)} [Session: {self.session_id}]")
             
@@ -88,6 +166,7 @@ class OpenAILLM(BaseLLM):
                               prompt: str,
                               temperature: float = settings.LLM.DEFAULT_PARAMETERS["temperature"],
                               max_tokens: int = settings.LLM.DEFAULT_PARAMETERS["max_tokens"],
+                              n: int = 1,
                               **kwargs) -> Dict[str, Any]:
         """
         Generate a response using OpenAI's API with comprehensive tracking.
@@ -96,12 +175,16 @@ class OpenAILLM(BaseLLM):
             prompt (str): Input text for the model
             temperature (float): Controls randomness (0.0 to 1.0)
             max_tokens (int): Maximum tokens to generate
+            n (int): Number of completions to sample in the same request; the
+                prompt is only sent and billed once
             **kwargs: Additional OpenAI-specific parameters
             
         Returns:
             Dict[str, Any]: Response dictionary containing:
-                - response (str): Generated text
+                - response (str): Generated text (the first completion)
+                - choices (List[str]): All n generated texts, in order
                 - metadata (dict): Comprehensive metadata including:
+                    - provider: Provider that served the request
                     - model: Model used
                     - tokens: Token usage statistics
                     - costs: Cost breakdown
@@ -112,8 +195,13 @@ class OpenAILLM(BaseLLM):
             LLMException: For API errors or unexpected issues
         """
         try:
+            # Serve repeated deterministic requests from the cache
+            cache_key = self.cache_key(prompt, temperature, max_tokens, n=n, **kwargs)
+            if cached := await self.cached_response(cache_key, prompt):
+                return cached
+            
             # Record start time
-            start_time = time.time()
+            start_time = time.perf_counter()
             
             # Prepare request parameters
             request_params = {
@@ -121,65 +209,318 @@ class OpenAILLM(BaseLLM):
                 "messages": [{"role": "user", "content": prompt}],
                 "temperature": temperature,
                 "max_tokens": max_tokens,
+                "n": n,
                 **kwargs
             }
             
             # Make API call with retry logic
-            for attempt in range(settings.LLM.DEFAULT_PARAMETERS["retry_attempts"]):
-                try:
-                    response = await self.client.chat.completions.create(**request_params)
-                    break
-                except OpenAIError as e:
-                    if attempt == settings.LLM.DEFAULT_PARAMETERS["retry_attempts"] - 1:
-                        raise
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+            tokens_needed = self._prompt_tokens(prompt, max_tokens) + max_tokens * n
+            response, attempt = await self.retry_request(
+                lambda: self._create(request_params, tokens_needed),
+                OpenAIError
+            )
             
             # Calculate timing and costs
-            end_time = time.time()
+            end_time = time.perf_counter()
             response_time = end_time - start_time
             
-            # Get cost information
-            model_costs = settings.get_model_cost("openai", self.model)
-            prompt_cost = (response.usage.prompt_tokens / 1000) * model_costs["input"]
-            completion_cost = (response.usage.completion_tokens / 1000) * model_costs["output"]
-            total_cost = prompt_cost + completion_cost
-            
-            # Prepare comprehensive response
-            result = {
-                "response": response.choices[0].message.content,
-                "metadata": {
-                    "model": self.model,
-                    "tokens": {
-                        "prompt_tokens": response.usage.prompt_tokens,
-                        "completion_tokens": response.usage.completion_tokens,
-                        "total_tokens": response.usage.total_tokens
-                    },
-                    "costs": {
-                        "prompt_cost": round(prompt_cost, 6),
-                        "completion_cost": round(completion_cost, 6),
-                        "total_cost": round(total_cost, 6)
-                    },
-                    "performance": {
-                        "response_time": round(response_time, 3),
-                        "tokens_per_second": round(response.usage.total_tokens / response_time, 2),
-                        "retry_count": attempt
-                    },
-                    "session_info": self.get_session_info(),
-                    "completion_info": {
-                        "finish_reason": response.choices[0].finish_reason,
-                        "created": datetime.fromtimestamp(response.created).isoformat()
-                    }
+            return await self._complete(prompt, response, response_time, attempt, cache_key)
+            
+        except OpenAIError as e:
+            error_msg = f"OpenAI API error: {str(e)}"
+            self.logger.error(f"{error_msg} [Session: {self.session_id}]")
+            raise LLMException(error_msg)
+        except LLMException:
+            raise
+        except Exception as e:
+            error_msg = f"Unexpected error: {str(e)}"
+            self.logger.error(f"{error_msg} [Session: {self.session_id}]")
+            raise LLMException(error_msg)
+            
+    def estimate_tokens(self, text: str) -> int:
+        """Count text's tokens with the model's tiktoken encoding, when available."""
+        encoding = _encoding_for(self.model) if self.model else None
+        if encoding is None:
+            return super().estimate_tokens(text)
+        return len(encoding.encode(text, disallowed_special=()))
+        
+    def _prompt_tokens(self, prompt: str, max_tokens: int) -> int:
+        """
+        Count the prompt's tokens, rejecting prompts that cannot fit the model's context window.
+        
+        Only exact (tiktoken) counts are checked; the fallback estimate is too
+        rough to refuse a request on.
+        """
+        tokens = self.estimate_tokens(prompt)
+        if self.model is None or _encoding_for(self.model) is None:
+            return tokens
+        window = settings.LLM.OPENAI_CONTEXT_WINDOWS.get(self.model)
+        if window and tokens + max_tokens > window:
+            raise LLMException(
+                f"Prompt of {tokens} tokens plus max_tokens={max_tokens} exceeds "
+                f"the {window}-token context window of {self.model}"
+            )
+        return tokens
+        
+    async def _create(self,
+                      request_params: Dict[str, Any],
+                      tokens_needed: int) -> Union[ChatCompletion, AsyncStream[ChatCompletionChunk]]:
+        """Send one chat completion request, pacing it by the reported rate limits."""
+        # Hold off until the reported quota resets rather than bursting into a 429
+        await self._rate_limit.wait(settings.LLM.MAX_CONCURRENT_REQUESTS, tokens_needed)
+        try:
+            raw = await self.client.chat.completions.with_raw_response.create(**request_params)
+        except APIStatusError as e:
+            self._rate_limit.update(e.response.headers)
+            raise
+        self._rate_limit.update(raw.headers)
+        return raw.parse()
+        
+    async def stream_response(self,
+                              prompt: str,
+                              temperature: float = settings.LLM.DEFAULT_PARAMETERS["temperature"],
+                              max_tokens: int = settings.LLM.DEFAULT_PARAMETERS["max_tokens"],
+                              **kwargs) -> AsyncIterator[Union[str, Dict[str, Any]]]:
+        """
+        Stream a response using OpenAI's streaming chat completions.
+        
+        Text deltas are yielded as they arrive, followed by the usual result
+        dictionary; token usage comes from the final chunk (include_usage).
+        Opening the stream is retried like any request, but a stream that
+        fails part-way is not, since the caller already has its text.
+        
+        Args:
+            prompt (str): Input text for the model
+            temperature (float): Controls randomness (0.0 to 1.0)
+            max_tokens (int): Maximum tokens to generate
+            **kwargs: Additional OpenAI-specific parameters
+            
+        Raises:
+            LLMException: For API errors or unexpected issues
+        """
+        try:
+            cache_key = self.cache_key(prompt, temperature, max_tokens, **kwargs)
+            if cached := await self.cached_response(cache_key, prompt):
+                yield cached["response"]
+                yield cached
+                return
+            
+            start_time = time.perf_counter()
+            request_params = {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": True,
+                "stream_options": {"include_usage": True},
+                **kwargs
+            }
+            tokens_needed = self._prompt_tokens(prompt, max_tokens) + max_tokens
+            stream, attempt = await self.retry_request(
+                lambda: self._create(request_params, tokens_needed),
+                OpenAIError
+            )
+            
+            text, finish_reason, usage, last = [], None, None, None
+            async for chunk in stream:
+                last = chunk
+                if chunk.usage:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                if delta := chunk.choices[0].delta.content:
+                    text.append(delta)
+                    yield delta
+                finish_reason = chunk.choices[0].finish_reason or finish_reason
+            response_time = time.perf_counter() - start_time
+            if last is None:
+                raise LLMException("OpenAI stream ended without any chunks")
+            
+            # Reassemble the completion so both paths share _complete()
+            response = ChatCompletion.model_validate({
+                "id": last.id,
+                "object": "chat.completion",
+                "created": last.created,
+                "model": last.model,
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": finish_reason or "stop",
+                    "message": {"role": "assistant", "content": "".join(text)}
+                }],
+                "usage": usage
+            })
+            yield await self._complete(prompt, response, response_time, attempt, cache_key)
+            
+        except OpenAIError as e:
+            error_msg = f"OpenAI API error: {str(e)}"
+            self.logger.error(f"{error_msg} [Session: {self.session_id}]")
+            raise LLMException(error_msg)
+        except LLMException:
+            raise
+        except Exception as e:
+            error_msg = f"Unexpected error: {str(e)}"
+            self.logger.error(f"{error_msg} [Session: {self.session_id}]")
+            raise LLMException(error_msg)
+            
+    async def _complete(self,
+                        prompt: str,
+                        response: ChatCompletion,
+                        response_time: float,
+                        attempt: int,
+                        cache_key: Optional[str],
+                        cost_factor: float = 1.0) -> Dict[str, Any]:
+        """Build, validate, cache and log the result dict for a finished completion."""
+        usage = response.usage
+        if usage is None:
+            # Optional in the API schema, though chat completions always report it
+            self.logger.warning("OpenAI response %s reported no usage; recording 0 tokens", response.id)
+            usage = CompletionUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+        choice = response.choices[0]
+        
+        # Get cost information
+        prompt_cost = usage.prompt_tokens * self._input_cost_per_token * cost_factor
+        completion_cost = usage.completion_tokens * self._output_cost_per_token * cost_factor
+        total_cost = prompt_cost + completion_cost
+        
+        # Prepare comprehensive response
+        result = {
+            "response": choice.message.content,
+            # All n completions, in order; usage already covers every one
+            "choices": [sample.message.content for sample in response.choices],
+            "metadata": {
+                "provider": "openai",
+                "model": self.model,
+                "tokens": {
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "total_tokens": usage.total_tokens
+                },
+                "costs": {
+                    "prompt_cost": prompt_cost,
+                    "completion_cost": completion_cost,
+                    "total_cost": total_cost
+                },
+                "performance": {
+                    "response_time": response_time,
+                    "tokens_per_second": usage.total_tokens / response_time,
+                    "retry_count": attempt
+                },
+                "session_info": self.get_session_info(),
+                "completion_info": {
+                    "finish_reason": choice.finish_reason,
+                    "created_unix": response.created
                 }
             }
+        }
+        
+        # Validate response format; a developer check, so only in DEBUG (never under python -O)
+        if __debug__ and settings.DEBUG and not self.validate_response(result):
+            raise LLMException("Invalid response format from OpenAI")
+        
+        if cache_key and self.cache is not None:
+            await self.cache.set(cache_key, result, prompt)
+        
+        # Log interaction
+        self.log_interaction(prompt, result)
+        
+        return result
+            
+    async def generate_batch(self,
+                             prompts: List[str],
+                             temperature: float = settings.LLM.DEFAULT_PARAMETERS["temperature"],
+                             max_tokens: int = settings.LLM.DEFAULT_PARAMETERS["max_tokens"],
+                             **kwargs) -> List[Union[Dict[str, Any], LLMException]]:
+        """
+        Generate responses for many prompts through OpenAI's Batch API.
+        
+        The prompts are uploaded as one JSONL file and processed asynchronously
+        by OpenAI within a 24h window, at a discounted token price and outside
+        the synchronous rate limits. This call polls until the batch finishes,
+        so it suits bulk/offline jobs rather than interactive use.
+        
+        Args:
+            prompts (List[str]): Input texts, one request each
+            temperature (float): Controls randomness (0.0 to 1.0)
+            max_tokens (int): Maximum tokens to generate per request
+            **kwargs: Additional OpenAI-specific parameters
+            
+        Returns:
+            List[Union[Dict[str, Any], LLMException]]: One entry per prompt, in
+                order: the usual response dictionary (costs reflect the batch
+                discount, response_time is the whole batch's duration), or an
+                LLMException for a request that failed
+                
+        Raises:
+            LLMException: If the batch cannot be submitted or ends without output
+        """
+        try:
+            start_time = time.perf_counter()
+            
+            # One chat completion request per line, matched back by custom_id
+            requests = b"\n".join(
+                orjson.dumps({
+                    "custom_id": f"req-{index}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "temperature": temperature,
+                        "max_tokens": max_tokens,
+                        **kwargs
+                    }
+                })
+                for index, prompt in enumerate(prompts)
+            )
+            batch_file = await self.client.files.create(
+                file=("batch.jsonl", requests),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
             
-            # Validate response format
-            if not self.validate_response(result):
-                raise LLMException("Invalid response format from OpenAI")
+            # Poll with backoff until the batch reaches a terminal state
+            delay = settings.LLM.BATCH_POLL_INTERVAL_SEC
+            while batch.status in PENDING_BATCH_STATUSES:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.LLM.BATCH_POLL_MAX_INTERVAL_SEC)
+                batch = await self.client.batches.retrieve(batch.id)
             
-            # Log interaction
-            self.log_interaction(prompt, result)
+            if not (batch.output_file_id or batch.error_file_id):
+                raise LLMException(f"OpenAI batch {batch.id} ended with status {batch.status}")
             
-            return result
+            response_time = time.perf_counter() - start_time
+            results: List[Union[Dict[str, Any], LLMException]] = [
+                LLMException(f"OpenAI batch {batch.id} returned no result for this prompt")
+                for _ in prompts
+            ]
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                content = await self.client.files.content(file_id)
+                for line in content.text.splitlines():
+                    if not line:
+                        continue
+                    record = orjson.loads(line)
+                    index = int(record["custom_id"].removeprefix("req-"))
+                    response = record.get("response") or {}
+                    if record.get("error") or response.get("status_code") != 200:
+                        results[index] = LLMException(
+                            f"OpenAI batch request failed: {record.get('error') or response.get('body')}"
+                        )
+                        continue
+                    results[index] = await self._complete(
+                        prompts[index],
+                        ChatCompletion.model_validate(response["body"]),
+                        response_time,
+                        0,
+                        None,
+                        settings.LLM.OPENAI_BATCH_COST_FACTOR
+                    )
+            return results
             
         except OpenAIError as e:
             error_msg = f"OpenAI API error: {str(e)}"
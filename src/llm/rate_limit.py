@@ -0,0 +1,99 @@
+# src/llm/rate_limit.py
+
+from dataclasses import dataclass
+from typing import Mapping, Optional
+import asyncio
+import re
+import time
+
+class TokenBucket:
+    """
+    Async token bucket for client-side rate limiting.
+
+    Holds up to capacity tokens and refills continuously at rate tokens per
+    second; acquire() waits until enough tokens are available. Refill is
+    computed lazily on each acquire, so no background task is needed.
+
+    Usage:
+        requests_per_minute = TokenBucket(capacity=3000, rate=3000 / 60)
+        await requests_per_minute.acquire()
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        """
+        Args:
+            capacity (float): Maximum tokens held (the allowed burst)
+            rate (float): Tokens added per second
+        """
+        self.capacity = capacity
+        self.rate = rate
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1) -> None:
+        """
+        Wait until amount tokens are available, then take them.
+
+        Requests larger than the capacity are capped to it, so they wait for a
+        full bucket instead of forever.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: str) -> float:
+    """Convert a rate-limit reset header such as "6m0s", "1.5s" or "20ms" to seconds."""
+    return sum(
+        float(amount) * _DURATION_UNITS[unit]
+        for amount, unit in _DURATION_PATTERN.findall(value)
+    )
+
+
+@dataclass(slots=True)
+class RateLimitState:
+    """
+    Remaining quota reported by a provider's x-ratelimit-* response headers.
+
+    Shared by every client using the same API key: after each response
+    update() records what is left and when it resets, and wait() holds new
+    requests until the reset when too little headroom remains, instead of
+    sending them into a 429.
+    """
+    remaining_requests: Optional[int] = None
+    remaining_tokens: Optional[int] = None
+    requests_reset_at: float = 0.0  # time.monotonic() deadline
+    tokens_reset_at: float = 0.0
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Record the limits reported in a response's headers, if present."""
+        now = time.monotonic()
+        if (remaining := headers.get("x-ratelimit-remaining-requests")) is not None:
+            self.remaining_requests = int(remaining)
+            self.requests_reset_at = now + parse_reset_duration(headers.get("x-ratelimit-reset-requests", ""))
+        if (remaining := headers.get("x-ratelimit-remaining-tokens")) is not None:
+            self.remaining_tokens = int(remaining)
+            self.tokens_reset_at = now + parse_reset_duration(headers.get("x-ratelimit-reset-tokens", ""))
+
+    async def wait(self, min_requests: int, min_tokens: int) -> None:
+        """Sleep until the relevant window resets if remaining quota is below the minimums."""
+        now = time.monotonic()
+        delay = 0.0
+        if self.remaining_requests is not None and self.remaining_requests < min_requests:
+            delay = max(delay, self.requests_reset_at - now)
+        if self.remaining_tokens is not None and self.remaining_tokens < min_tokens:
+            delay = max(delay, self.tokens_reset_at - now)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -1,4 +1,7 @@
+import asyncio
 import pytest
+from types import SimpleNamespace
+from anthropic.types import TextBlock
 from src.config.settings import settings
 
 @pytest.fixture(scope="session")
@@ -10,4 +13,46 @@ def test_settings():
 def setup_test_env(monkeypatch):
     """Setup test environment."""
     monkeypatch.setenv("ENVIRONMENT", "testing")
-    return None
\ No newline at end of file
+    return None
+
+@pytest.fixture
+def anthropic_message():
+    """Build a stand-in for an Anthropic Message holding one text block."""
+    def build(text, input_tokens=1, output_tokens=1):
+        return SimpleNamespace(
+            content=[TextBlock(type="text", text=text)],
+            usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens),
+            stop_reason="end_turn"
+        )
+    return build
+
+@pytest.fixture
+def fake_anthropic_create(anthropic_message):
+    """
+    Stand-in for client.messages.create that echoes the prompt back.
+
+    Each call takes 10ms; peak records the most calls in flight at once and
+    the prompt "fail" raises.
+    """
+    class FakeCreate:
+        def __init__(self):
+            self.in_flight = 0
+            self.peak = 0
+
+        async def __call__(self, **kwargs):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            try:
+                await asyncio.sleep(0.01)
+            finally:
+                self.in_flight -= 1
+            prompt = kwargs["messages"][0]["content"]
+            if prompt == "fail":
+                raise ValueError("boom")
+            return anthropic_message(prompt)
+    return FakeCreate()
+
+@pytest.fixture
+def raw_openai_response():
+    """Wrap a parsed result the way chat.completions.with_raw_response.create returns it."""
+    return lambda parsed, headers=None: SimpleNamespace(headers=headers or {}, parse=lambda: parsed)
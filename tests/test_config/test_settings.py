@@ -1,8 +1,13 @@
 # tests/test_config/test_settings.py
 
+import os
+import sys
+import types
 import pytest
+from pydantic import ValidationError
 from pathlib import Path
-from src.config.settings import Settings, LLMConfig, MonitoringConfig
+import src.config.settings as settings_module
+from src.config.settings import Settings, LLMConfig, MonitoringConfig, get_settings
 
 @pytest.fixture
 def settings():
@@ -15,12 +20,20 @@ def test_settings_initialization(settings):
     assert isinstance(settings.VERSION, str)
     assert isinstance(settings.BASE_DIR, Path)
 
+def test_get_settings_is_cached():
+    """Test that the settings singleton is only built once."""
+    assert get_settings() is get_settings()
+
 def test_llm_config(settings):
     """Test LLM configuration."""
     assert isinstance(settings.LLM.OPENAI_MODELS, list)
     assert isinstance(settings.LLM.ANTHROPIC_MODELS, list)
     assert "gpt-4" in settings.LLM.OPENAI_MODELS
     assert "claude-3-haiku-20240307" in settings.LLM.ANTHROPIC_MODELS
+    assert "gpt-4" in settings.LLM.OPENAI_MODELS_SET
+    assert settings.LLM.MODEL_TO_PROVIDER["gpt-3.5-turbo"] == "openai"
+    assert settings.LLM.MODEL_TO_PROVIDER["claude-3-5-sonnet-latest"] == "anthropic"
+    assert settings.LLM.MODELS_BY_PROVIDER["OpenAI"] == tuple(settings.LLM.OPENAI_MODELS)
 
 def test_monitoring_config(settings):
     """Test monitoring configuration."""
@@ -30,11 +43,17 @@ def test_monitoring_config(settings):
 
 def test_api_key_validation(settings):
     """Test API key validation."""
-    validation_result = settings.validate_keys()
+    validation_result = settings.check_api_keys
     assert isinstance(validation_result, dict)
     assert "openai" in validation_result
     assert "anthropic" in validation_result
 
+def test_api_keys_resolved_lazily(monkeypatch):
+    """Test API keys are read from the environment on first access."""
+    lazy_settings = Settings()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-lazy")
+    assert lazy_settings.OPENAI_API_KEY == "sk-lazy"
+
 def test_cost_tracking(settings):
     """Test cost tracking functionality."""
     gpt4_cost = settings.get_model_cost("openai", "gpt-4")
@@ -42,12 +61,70 @@ def test_cost_tracking(settings):
     assert "input" in gpt4_cost
     assert "output" in gpt4_cost
 
+def test_model_costs_file_and_fallback(tmp_path):
+    """Test model costs load from DATA_DIR and fall back when unreadable."""
+    (tmp_path / "model_costs.json").write_text(
+        '{"openai": {"gpt-4": {"input": 1.0, "output": 2.0}}}'
+    )
+    file_settings = Settings(DATA_DIR=tmp_path)
+    assert file_settings.get_model_cost("openai", "gpt-4") == {"input": 1.0, "output": 2.0}
+    
+    missing_settings = Settings(DATA_DIR=tmp_path / "missing")
+    assert missing_settings.MODEL_COSTS == settings_module.DEFAULT_MODEL_COSTS
+
+def test_model_costs_reload_when_file_changes(tmp_path):
+    """Test an edited cost file is picked up without a new Settings instance."""
+    costs_file = tmp_path / "model_costs.json"
+    costs_file.write_text('{"openai": {"gpt-4": {"input": 1.0, "output": 2.0}}}')
+    file_settings = Settings(DATA_DIR=tmp_path)
+    assert file_settings.get_model_cost("openai", "gpt-4") == {"input": 1.0, "output": 2.0}
+    
+    costs_file.write_text('{"openai": {"gpt-4": {"input": 3.0, "output": 4.0}}}')
+    os.utime(costs_file, (0, 0))
+    assert file_settings.get_model_cost("openai", "gpt-4") == {"input": 3.0, "output": 4.0}
+    
+    # A broken edit keeps the last good prices
+    costs_file.write_text("{not json")
+    os.utime(costs_file, (1, 1))
+    assert file_settings.get_model_cost("openai", "gpt-4") == {"input": 3.0, "output": 4.0}
+
 def test_directory_setup(settings, tmp_path):
     """Test directory creation."""
-    settings.BASE_DIR = tmp_path
-    settings.LOG_DIR = tmp_path / "logs"
-    settings.DATA_DIR = tmp_path / "data"
+    tmp_settings = settings.model_copy(update={
+        "BASE_DIR": tmp_path,
+        "LOG_DIR": tmp_path / "logs",
+        "DATA_DIR": tmp_path / "data"
+    })
+    
+    tmp_settings.setup_directories()
+    assert tmp_settings.LOG_DIR.exists()
+    assert tmp_settings.DATA_DIR.exists()
+
+def test_settings_are_frozen(settings):
+    """Test settings reject mutation and unknown fields."""
+    with pytest.raises(ValidationError):
+        settings.DEBUG = True
+    with pytest.raises(ValidationError):
+        Settings(UNKNOWN_SETTING=1)
+
+def test_load_env_prefers_compiled_cache(monkeypatch, tmp_path):
+    """Test compiled env values are used while .env is unchanged."""
+    env_file = tmp_path / ".env"
+    env_file.write_text("OBSERVATORY_TEST_VAR=from-dotenv\n")
+    cache = types.SimpleNamespace(
+        MTIME=env_file.stat().st_mtime,
+        ENV={"OBSERVATORY_TEST_VAR": "from-cache"}
+    )
+    monkeypatch.setattr(settings_module, "ENV_FILE", env_file)
+    monkeypatch.setitem(sys.modules, "src.config._env_cache", cache)
+    monkeypatch.delenv("OBSERVATORY_TEST_VAR", raising=False)
+    
+    settings_module.load_env()
+    assert settings_module.os.environ["OBSERVATORY_TEST_VAR"] == "from-cache"
     
-    settings.setup_directories()
-    assert settings.LOG_DIR.exists()
-    assert settings.DATA_DIR.exists()
\ No newline at end of file
+    # A stale cache falls back to parsing .env
+    cache.MTIME = 0.0
+    monkeypatch.delenv("OBSERVATORY_TEST_VAR")
+    settings_module.load_env()
+    assert settings_module.os.environ["OBSERVATORY_TEST_VAR"] == "from-dotenv"
+    monkeypatch.delenv("OBSERVATORY_TEST_VAR")
@@ -1,41 +1,140 @@
 # tests/test_llm/test_anthropic.py
 
+import asyncio
 import pytest
+import pytest_asyncio
 from src.llm.anthropic_llm import AnthropicLLM
+from src.llm.base import LLMException
 from src.config.settings import settings
 
-@pytest.mark.asyncio
+@pytest_asyncio.fixture(scope="class", loop_scope="class")
+async def llm():
+    """One instance shared by the read-only tests of a test class."""
+    if not settings.ANTHROPIC_API_KEY:
+        pytest.skip("ANTHROPIC_API_KEY is not configured")
+    llm = AnthropicLLM(
+        api_key=settings.ANTHROPIC_API_KEY,
+        model="claude-3-haiku-20240307",
+        application_id="test-suite",
+        environment="testing"
+    )
+    
+    yield llm
+    
+    await llm.cleanup()
+
+@pytest.mark.asyncio(loop_scope="class")
 class TestAnthropicLLM:
     """Test suite for Anthropic LLM implementation."""
     
-    @pytest.fixture(autouse=True)
-    async def setup_and_teardown(self):
-        """Setup and teardown for each test."""
-        self.llm = AnthropicLLM(
-            api_key=settings.ANTHROPIC_API_KEY,
-            model="claude-3-haiku-20240307",
-            application_id="test-suite",
-            environment="testing"
-        )
-        
-        yield
-        
-        await self.llm.cleanup()
-    
-    async def test_anthropic_initialization(self):
+    async def test_anthropic_initialization(self, llm):
         """Test basic Anthropic LLM initialization."""
-        assert self.llm.model == "claude-3-haiku-20240307"
-        assert self.llm.application_id == "test-suite"
-        assert self.llm.environment == "testing"
+        assert llm.model == "claude-3-haiku-20240307"
+        assert llm.application_id == "test-suite"
+        assert llm.environment == "testing"
         
-        key_status = settings.check_api_keys()
+        key_status = settings.check_api_keys
         assert isinstance(key_status, dict)
         assert "anthropic" in key_status
     
-    async def test_model_info(self):
+    async def test_model_info(self, llm):
         """Test model info retrieval."""
-        info = self.llm.get_model_info()
+        info = llm.get_model_info()
         assert info["provider"] == "Anthropic"
         assert info["model"] == "claude-3-haiku-20240307"
         assert "capabilities" in info
-        assert "cost_info" in info
\ No newline at end of file
+        assert "cost_info" in info
+
+
+@pytest.mark.asyncio
+async def test_client_pooled_per_api_key():
+    """Test instances sharing an API key share one client until the last cleanup."""
+    first = AnthropicLLM(api_key="sk-ant-pool-test")
+    second = AnthropicLLM(api_key="sk-ant-pool-test", model="claude-3-opus-latest")
+    client = first.client
+    assert second.client is client
+    
+    await first.cleanup()
+    assert not client.is_closed()
+    await second.cleanup()
+    assert client.is_closed()
+
+
+@pytest.mark.asyncio
+async def test_generate_many_bounds_concurrency(fake_anthropic_create):
+    """Test that generate_many caps in-flight requests and keeps failures in place."""
+    llm = AnthropicLLM(api_key="sk-ant-many-test")
+    llm.client.messages.create = fake_anthropic_create
+    
+    results = await llm.generate_many(["a", "b", "fail", "c", "d"], max_concurrency=2)
+    await llm.cleanup()
+    
+    assert [r["response"] for r in results if isinstance(r, dict)] == ["a", "b", "c", "d"]
+    assert isinstance(results[2], Exception)
+    assert fake_anthropic_create.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_buffered_generation_batches_prompts(fake_anthropic_create):
+    """Test that buffered prompts are coalesced and every future resolves."""
+    llm = AnthropicLLM(api_key="sk-ant-buffer-test")
+    llm.client.messages.create = fake_anthropic_create
+    
+    async with llm.buffered_generation(max_batch=4, flush_interval=0.05) as buffer:
+        futures = [buffer.try_generate(f"prompt {i}") for i in range(6)]
+    
+    assert [future.result()["response"] for future in futures] == [f"prompt {i}" for i in range(6)]
+    # The second batch is dispatched without waiting for the first to finish
+    assert fake_anthropic_create.peak == 6
+    with pytest.raises(LLMException):
+        buffer.try_generate("too late")
+    await llm.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_overlapping_buffered_generation_blocks_stay_separate(fake_anthropic_create):
+    """Test that two blocks on one shared instance each resolve only their own prompts."""
+    llm = AnthropicLLM(api_key="sk-ant-buffer-test")
+    llm.client.messages.create = fake_anthropic_create
+    
+    async def session(name):
+        async with llm.buffered_generation(flush_interval=0.05) as buffer:
+            futures = [buffer.try_generate(f"{name} {i}") for i in range(3)]
+            await asyncio.sleep(0)
+        return [future.result()["response"] for future in futures]
+    
+    first, second = await asyncio.gather(session("first"), session("second"))
+    await llm.cleanup()
+    
+    assert first == ["first 0", "first 1", "first 2"]
+    assert second == ["second 0", "second 1", "second 2"]
+
+
+@pytest.mark.asyncio
+async def test_stream_response_yields_text_then_result(anthropic_message):
+    """Test that streamed deltas arrive before the final result dict."""
+    llm = AnthropicLLM(api_key="sk-ant-stream-test")
+    message = anthropic_message("Hello world", input_tokens=3, output_tokens=2)
+    
+    class FakeStream:
+        async def __aenter__(self):
+            return self
+        
+        async def __aexit__(self, *exc_info):
+            return False
+        
+        @property
+        async def text_stream(self):
+            for text in ("Hello", " world"):
+                yield text
+        
+        async def get_final_message(self):
+            return message
+    llm.client.messages.stream = lambda **kwargs: FakeStream()
+    
+    *chunks, result = [item async for item in llm.stream_response("hi")]
+    await llm.cleanup()
+    
+    assert chunks == ["Hello", " world"]
+    assert result["response"] == "Hello world"
+    assert result["metadata"]["tokens"]["total_tokens"] == 5
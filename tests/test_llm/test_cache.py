@@ -0,0 +1,107 @@
+# tests/test_llm/test_cache.py
+
+import asyncio
+import time
+import pytest
+from src.llm.cache import LLMCache, SemanticCache
+from src.llm.anthropic_llm import AnthropicLLM
+
+def test_cache_key_is_stable():
+    """Test that keys only depend on the request parameters."""
+    key = LLMCache.make_key("gpt-4", "hi", 0, 100, top_p=1)
+    assert key == LLMCache.make_key("gpt-4", "hi", 0, 100, top_p=1)
+    assert key != LLMCache.make_key("gpt-4", "hi", 0, 200, top_p=1)
+    assert key != LLMCache.make_key("gpt-3.5-turbo", "hi", 0, 100, top_p=1)
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used():
+    """Test LRU eviction and hit/miss accounting."""
+    cache = LLMCache(max_entries=2)
+    await cache.set("a", {"response": "A"})
+    await cache.set("b", {"response": "B"})
+    assert await cache.get("a") == {"response": "A"}
+    await cache.set("c", {"response": "C"})
+    
+    assert await cache.get("b") is None
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_cache_hits_are_isolated_copies():
+    """Test that mutating a stored or returned result does not change later hits."""
+    cache = LLMCache()
+    result = {"response": "A", "metadata": {"tokens": 1}}
+    await cache.set("a", result)
+    result["metadata"]["tokens"] = 2
+    
+    hit = await cache.get("a")
+    hit["response"] = "changed"
+    
+    assert await cache.get("a") == {"response": "A", "metadata": {"tokens": 1}}
+
+@pytest.mark.asyncio
+async def test_semantic_cache_matches_paraphrases():
+    """Test similarity hits within a scope and the digit gate."""
+    vectors = {
+        "what is the capital of france": [1.0, 0.0],
+        "tell me france's capital": [0.99, 0.05],
+        "what is a llama": [0.0, 1.0],
+    }
+    cache = SemanticCache(embed=lambda text: vectors.get(text, [0.7, 0.7]), threshold=0.95)
+    key = lambda prompt, model="gpt-4": LLMCache.make_key(model, prompt, 0, 100)
+    
+    await cache.set(key("what is the capital of france"), {"response": "Paris"},
+                    "what is the capital of france")
+    
+    paraphrase = await cache.get(key("tell me france's capital"), "tell me france's capital")
+    unrelated = await cache.get(key("what is a llama"), "what is a llama")
+    other_model = await cache.get(key("tell me france's capital", "gpt-3.5-turbo"), "tell me france's capital")
+    numeric = await cache.get(key("capital of france in 1789"), "capital of france in 1789")
+    assert paraphrase == {"response": "Paris"}
+    assert unrelated is None and other_model is None and numeric is None
+    assert (cache.semantic_hits, cache.misses) == (1, 3)
+
+@pytest.mark.asyncio
+async def test_only_deterministic_requests_are_cached():
+    """Test that sampled requests and uncached instances get no key."""
+    cached = AnthropicLLM(api_key="sk-ant-cache-test", cache=LLMCache())
+    uncached = AnthropicLLM(api_key="sk-ant-cache-test")
+    
+    assert cached.cache_key("hi", 0, 100) is not None
+    assert cached.cache_key("hi", 0.7, 100) is None
+    assert uncached.cache_key("hi", 0, 100) is None
+    
+    await cached.cleanup()
+    await uncached.cleanup()
+
+@pytest.mark.asyncio
+async def test_semantic_cache_stays_consistent_under_concurrent_sets():
+    """Test that an entry evicted while another prompt is embedded leaves no orphan vector."""
+    def embed(text):
+        time.sleep(0.05 if text == "slow prompt" else 0)
+        return [1.0, 0.0] if text == "slow prompt" else [0.0, 1.0]
+    cache = SemanticCache(embed=embed, max_entries=1)
+    
+    await asyncio.gather(
+        cache.set("s:slow", {"response": "slow"}, "slow prompt"),
+        cache.set("s:fast", {"response": "fast"}, "fast prompt"),
+    )
+    
+    assert set(cache._vectors) == set(cache._entries) == {"s:slow"}
+
+@pytest.mark.asyncio
+async def test_cache_hits_report_no_spend(fake_anthropic_create):
+    """Test that a cache hit is marked cached and bills no tokens or cost."""
+    llm = AnthropicLLM(api_key="sk-ant-cache-test", cache=LLMCache())
+    llm.client.messages.create = fake_anthropic_create
+    
+    first = await llm.generate_response("hi", temperature=0)
+    hit = await llm.generate_response("hi", temperature=0)
+    await llm.cleanup()
+    
+    assert first["metadata"]["costs"]["total_cost"] > 0
+    assert "cached" not in first["metadata"]
+    assert hit["response"] == first["response"]
+    assert hit["metadata"]["cached"] is True
+    assert set(hit["metadata"]["costs"].values()) == {0}
+    assert set(hit["metadata"]["tokens"].values()) == {0}
@@ -1,44 +1,215 @@
 # tests/test_llm/test_openai.py
 
+import orjson
 import pytest
+import pytest_asyncio
+from types import SimpleNamespace
+from openai.types.chat import ChatCompletion
+from src.llm.base import LLMException
+from src.llm import openai_llm
 from src.llm.openai_llm import OpenAILLM
 from src.config.settings import settings
 
-@pytest.mark.asyncio
+# Stands in for a tiktoken encoding: one token per whitespace-separated word
+WORD_ENCODING = SimpleNamespace(encode=lambda text, disallowed_special: text.split())
+
+@pytest_asyncio.fixture(scope="class", loop_scope="class")
+async def llm():
+    """One instance shared by the read-only tests of a test class."""
+    if not settings.OPENAI_API_KEY:
+        pytest.skip("OPENAI_API_KEY is not configured")
+    llm = OpenAILLM(
+        api_key=settings.OPENAI_API_KEY,
+        model="gpt-3.5-turbo",
+        application_id="test-suite",
+        environment="testing"
+    )
+    
+    yield llm
+    
+    await llm.cleanup()
+
+@pytest.mark.asyncio(loop_scope="class")
 class TestOpenAILLM:
     """Test suite for OpenAI LLM implementation."""
     
-    @pytest.fixture(autouse=True)
-    async def setup_and_teardown(self):
-        """Setup and teardown for each test."""
-        # Setup
-        self.llm = OpenAILLM(
-            api_key=settings.OPENAI_API_KEY,
-            model="gpt-3.5-turbo",
-            application_id="test-suite",
-            environment="testing"
-        )
-        
-        yield
-        
-        # Teardown - cleanup any async resources
-        if hasattr(self.llm, 'client'):
-            await self.llm.client.close()
-    
-    async def test_openai_initialization(self):
+    async def test_openai_initialization(self, llm):
         """Test basic OpenAI LLM initialization."""
-        assert self.llm.model == "gpt-3.5-turbo"
-        assert self.llm.application_id == "test-suite"
-        assert self.llm.environment == "testing"
+        assert llm.model == "gpt-3.5-turbo"
+        assert llm.application_id == "test-suite"
+        assert llm.environment == "testing"
         
         # Verify API key validation
-        key_status = settings.check_api_keys()
+        key_status = settings.check_api_keys
         assert isinstance(key_status, dict)
     
-    async def test_model_info(self):
+    async def test_model_info(self, llm):
         """Test model info retrieval."""
-        info = self.llm.get_model_info()
+        info = llm.get_model_info()
         assert info["provider"] == "OpenAI"
         assert info["model"] == "gpt-3.5-turbo"
         assert "capabilities" in info
-        assert "cost_info" in info
\ No newline at end of file
+        assert "cost_info" in info
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_maps_results_back_in_order(monkeypatch):
+    """Test Batch API submission, polling and per-request result mapping."""
+    monkeypatch.setattr(settings.LLM, "BATCH_POLL_INTERVAL_SEC", 0)
+    llm = OpenAILLM(api_key="sk-batch-test")
+    completion = {
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 1700000000, "model": "gpt-3.5-turbo",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "Paris"}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12}
+    }
+    output = b"\n".join([
+        orjson.dumps({"custom_id": "req-1", "response": {"status_code": 400, "body": {"error": "bad"}}, "error": None}),
+        orjson.dumps({"custom_id": "req-0", "response": {"status_code": 200, "body": completion}, "error": None}),
+    ])
+    uploads, statuses = [], iter(["in_progress", "completed"])
+    
+    async def create_file(file, purpose):
+        uploads.append((purpose, file[1]))
+        return SimpleNamespace(id="file-in")
+    
+    async def batch_status(*args, **kwargs):
+        return SimpleNamespace(id="batch-1", status=next(statuses), output_file_id="file-out", error_file_id=None)
+    
+    async def file_content(file_id):
+        return SimpleNamespace(text=output.decode())
+    
+    llm.client.files = SimpleNamespace(create=create_file, content=file_content)
+    llm.client.batches = SimpleNamespace(create=batch_status, retrieve=batch_status)
+    first, second = await llm.generate_batch(["capital of France?", "oops"])
+    await llm.cleanup()
+    
+    assert uploads[0][0] == "batch"
+    assert [orjson.loads(line)["custom_id"] for line in uploads[0][1].splitlines()] == ["req-0", "req-1"]
+    assert first["response"] == "Paris"
+    costs = settings.get_model_cost("openai", "gpt-3.5-turbo")
+    assert first["metadata"]["costs"]["total_cost"] == pytest.approx(
+        (10 * costs["input"] + 2 * costs["output"]) / 1000 * settings.LLM.OPENAI_BATCH_COST_FACTOR
+    )
+    assert isinstance(second, LLMException)
+
+
+@pytest.mark.asyncio
+async def test_client_pooled_per_api_key():
+    """Test instances sharing an API key share one client until the last cleanup."""
+    first = OpenAILLM(api_key="sk-pool-test")
+    second = OpenAILLM(api_key="sk-pool-test", model="gpt-4")
+    client = first.client
+    assert second.client is client
+    
+    await first.cleanup()
+    assert not client.is_closed()
+    await second.cleanup()
+    assert client.is_closed()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_releases_the_client_it_acquired(monkeypatch):
+    """Test that cleanup uses the pool key from setup, not the current timeout setting."""
+    llm = OpenAILLM(api_key="sk-pool-key-test")
+    client = llm.client
+    monkeypatch.setitem(settings.LLM.DEFAULT_PARAMETERS, "timeout", 99)
+    
+    await llm.cleanup()
+    assert client.is_closed()
+    assert not any(key[0] == "sk-pool-key-test" for key in openai_llm._CLIENT_REFS)
+
+
+@pytest.mark.asyncio
+async def test_stream_response_yields_deltas_then_result(raw_openai_response):
+    """Test that streamed deltas arrive first and usage comes from the final chunk."""
+    llm = OpenAILLM(api_key="sk-stream-test")
+    
+    def chunk(content=None, finish_reason=None, usage=None):
+        choices = [] if usage else [SimpleNamespace(
+            delta=SimpleNamespace(content=content), finish_reason=finish_reason
+        )]
+        return SimpleNamespace(id="chatcmpl-1", created=1700000000, model="gpt-3.5-turbo",
+                               choices=choices, usage=usage)
+    
+    async def stream():
+        yield chunk("Hello")
+        yield chunk(" world", finish_reason="stop")
+        yield chunk(usage={"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6})
+    
+    async def create(**kwargs):
+        assert kwargs["stream"] and kwargs["stream_options"] == {"include_usage": True}
+        return raw_openai_response(stream())
+    llm.client.chat.completions.with_raw_response.create = create
+    
+    *chunks, result = [item async for item in llm.stream_response("hi")]
+    await llm.cleanup()
+    
+    assert chunks == ["Hello", " world"]
+    assert result["response"] == "Hello world"
+    assert result["metadata"]["tokens"]["total_tokens"] == 6
+    assert result["metadata"]["completion_info"]["finish_reason"] == "stop"
+
+
+@pytest.mark.asyncio
+async def test_estimate_tokens_uses_tiktoken_encoding(monkeypatch):
+    """Test token estimates come from the model's encoding, falling back to chars / 4."""
+    llm = OpenAILLM(api_key="sk-tokens-test")
+    monkeypatch.setattr(openai_llm, "_encoding_for", lambda model: None)
+    assert llm.estimate_tokens("a" * 40) == 10
+    
+    monkeypatch.setattr(openai_llm, "_encoding_for", lambda model: WORD_ENCODING)
+    assert llm.estimate_tokens("one two three") == 3
+    await llm.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_oversized_prompt_is_rejected_before_sending(monkeypatch):
+    """Test that an exactly counted prompt over the context window never reaches the API."""
+    monkeypatch.setattr(openai_llm, "_encoding_for", lambda model: WORD_ENCODING)
+    monkeypatch.setitem(settings.LLM.OPENAI_CONTEXT_WINDOWS, "gpt-3.5-turbo", 10)
+    llm = OpenAILLM(api_key="sk-window-test")
+    
+    async def create(**kwargs):
+        raise AssertionError("request should not be sent")
+    llm.client.chat.completions.with_raw_response.create = create
+    
+    # Raised as-is rather than re-wrapped as an unexpected error
+    with pytest.raises(LLMException, match="^Prompt of 8 tokens .* context window"):
+        await llm.generate_response("word " * 8, max_tokens=5)
+    await llm.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_setup_loads_the_encoding(monkeypatch):
+    """Test the tokenizer is loaded in setup, not on the event loop's first request."""
+    loaded = []
+    monkeypatch.setattr(openai_llm, "_encoding_for", loaded.append)
+    llm = OpenAILLM(api_key="sk-warm-test", model="gpt-4")
+    assert loaded == ["gpt-4"]
+    await llm.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_generate_response_returns_all_samples_for_n(raw_openai_response):
+    """Test n > 1 samples in one request, with the prompt billed once."""
+    llm = OpenAILLM(api_key="sk-samples-test")
+    completion = ChatCompletion.model_validate({
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 1700000000, "model": "gpt-3.5-turbo",
+        "choices": [
+            {"index": i, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}
+            for i, text in enumerate(["A", "B", "C"])
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13}
+    })
+    
+    async def create(**kwargs):
+        assert kwargs["n"] == 3
+        return raw_openai_response(completion)
+    llm.client.chat.completions.with_raw_response.create = create
+    
+    result = await llm.generate_response("pick a letter", n=3)
+    await llm.cleanup()
+    
+    assert result["response"] == "A"
+    assert result["choices"] == ["A", "B", "C"]
+    assert result["metadata"]["costs"]["prompt_cost"] == 10 * llm._input_cost_per_token
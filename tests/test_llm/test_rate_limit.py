@@ -0,0 +1,62 @@
+# tests/test_llm/test_rate_limit.py
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.llm import rate_limit
+from src.llm.rate_limit import RateLimitState, TokenBucket, parse_reset_duration
+
+class FakeClock:
+    """Monotonic clock that only moves when rate_limit sleeps on it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self._sleep = asyncio.sleep
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+        await self._sleep(0)
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Run rate_limit's time and sleeps on a FakeClock."""
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limit, "asyncio", SimpleNamespace(sleep=clock.sleep, Lock=asyncio.Lock))
+    return clock
+
+@pytest.mark.asyncio
+async def test_token_bucket_waits_for_refill(clock):
+    """Test that a drained bucket blocks until it refills."""
+    bucket = TokenBucket(capacity=2, rate=20)
+
+    for _ in range(4):
+        await bucket.acquire()
+
+    # Two tokens are available at once; each of the other two takes 50ms to refill
+    assert clock.sleeps == [pytest.approx(0.05)] * 2
+
+def test_parse_reset_duration():
+    """Test rate-limit reset header parsing."""
+    assert parse_reset_duration("6m0s") == 360
+    assert parse_reset_duration("1.5s") == 1.5
+    assert parse_reset_duration("20ms") == 0.02
+
+@pytest.mark.asyncio
+async def test_rate_limit_state_waits_for_reset(clock):
+    """Test that low remaining quota delays the next request until the reset."""
+    state = RateLimitState()
+    state.update({"x-ratelimit-remaining-requests": "100", "x-ratelimit-reset-requests": "10s"})
+
+    # Plenty of requests left and no token headers seen: no wait
+    await state.wait(min_requests=8, min_tokens=1000)
+    assert clock.sleeps == []
+
+    state.update({"x-ratelimit-remaining-tokens": "10", "x-ratelimit-reset-tokens": "100ms"})
+    await state.wait(min_requests=8, min_tokens=1000)
+    assert clock.sleeps == [pytest.approx(0.1)]
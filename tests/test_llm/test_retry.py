@@ -0,0 +1,83 @@
+# tests/test_llm/test_retry.py
+
+import pytest
+from types import SimpleNamespace
+from src.llm import base
+from src.llm.anthropic_llm import AnthropicLLM
+from src.config.settings import settings
+
+class FakeAPIError(Exception):
+    """Provider error carrying an optional HTTP status, like the SDKs' errors."""
+
+    def __init__(self, status_code=None):
+        super().__init__(f"status {status_code}")
+        if status_code is not None:
+            self.status_code = status_code
+
+def failing(errors, result="ok"):
+    """Request factory raising each error in turn, then returning result."""
+    calls = []
+
+    async def request():
+        calls.append(len(calls))
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return request, calls
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting them out."""
+    recorded = []
+
+    async def sleep(seconds):
+        recorded.append(seconds)
+    monkeypatch.setattr(base, "asyncio", SimpleNamespace(sleep=sleep))
+    monkeypatch.setitem(settings.LLM.DEFAULT_PARAMETERS, "retry_attempts", 3)
+    monkeypatch.setattr(settings.LLM, "RETRY_BASE_SEC", 1.0)
+    monkeypatch.setattr(settings.LLM, "RETRY_CAP_SEC", 1.5)
+    return recorded
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(sleeps):
+    """Test that a 401 fails after a single call."""
+    llm = AnthropicLLM(api_key="sk-ant-retry-test")
+    request, calls = failing([FakeAPIError(401)])
+
+    with pytest.raises(FakeAPIError):
+        await llm.retry_request(request, FakeAPIError)
+    await llm.cleanup()
+
+    assert len(calls) == 1
+    assert sleeps == []
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code", [429, 500, 503])
+async def test_retriable_errors_use_every_attempt(sleeps, status_code):
+    """Test that rate limits and server errors are retried until attempts run out."""
+    llm = AnthropicLLM(api_key="sk-ant-retry-test")
+    request, calls = failing([FakeAPIError(status_code)] * 3)
+
+    with pytest.raises(FakeAPIError):
+        await llm.retry_request(request, FakeAPIError)
+    await llm.cleanup()
+
+    assert len(calls) == 3
+    # Full jitter: each wait is drawn from [0, min(cap, base * 2**attempt)]
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 1.5
+
+@pytest.mark.asyncio
+async def test_connection_errors_are_retried(sleeps):
+    """Test that errors without a status code are retried and the retry count returned."""
+    llm = AnthropicLLM(api_key="sk-ant-retry-test")
+    request, calls = failing([FakeAPIError(), FakeAPIError()])
+
+    assert await llm.retry_request(request, FakeAPIError) == ("ok", 2)
+
+    request, calls = failing([])
+    assert await llm.retry_request(request, FakeAPIError) == ("ok", 0)
+    await llm.cleanup()
+
+    assert len(calls) == 1
+    assert len(sleeps) == 2